@@ -0,0 +1,797 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for Bodet → vMix gateway.
+
+Kjøres lokalt uten vMix og uten Scorepad:
+
+    python bench_gateway.py transport        # requests.get vs keep-alive vs TCP API
+    python bench_gateway.py transport --checks-only   # kun TCP-feilveiene
+    python bench_gateway.py framer           # BodetFramer vs gammel bytes-parser
+    python bench_gateway.py framer --capture kamp.bdcap
+    python bench_gateway.py fuzz -n 200000   # muterte meldinger mot dekoderne
+    python bench_gateway.py startup          # headless: tid til port 4001 og første vMix-kall
+    python bench_gateway.py suite --json før.json   # hot paths, lagre resultat
+    python bench_gateway.py suite --compare før.json  # sammenlign med tidligere commit
+
+Suite-tallene er beste av flere repetisjoner med fast seed, så de kan
+sammenlignes mellom commits på samme maskin.
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import bodet_to_vmix_gui as gw
+
+# Benchmarkene skal ikke skrive over gatewayens ekte state-sjekkpunkt
+gw.CONFIG["state_checkpoint"] = ""
+
+# ==========================================================
+#  HJELPERE
+# ==========================================================
+
+def summarize(name: str, samples_s):
+    samples_ms = sorted(x * 1000.0 for x in samples_s)
+    n = len(samples_ms)
+    p50 = samples_ms[n // 2]
+    p95 = samples_ms[min(n - 1, int(n * 0.95))]
+    print(
+        f"{name:<28} n={n:<5} mean={statistics.mean(samples_ms):7.3f} ms  "
+        f"p50={p50:7.3f} ms  p95={p95:7.3f} ms  max={samples_ms[-1]:7.3f} ms"
+    )
+
+# ==========================================================
+#  LOKAL STAND-IN FOR VMIX WEB API
+# ==========================================================
+
+class _FakeVmixHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 slik at keep-alive faktisk virker (som vMix)
+    protocol_version = "HTTP/1.1"
+    # Header og body skrives separat; uten TCP_NODELAY gir Nagle +
+    # delayed ACK kunstige ~40 ms på gjenbrukte forbindelser
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b"Function completed successfully."
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_vmix_http(handler=_FakeVmixHandler):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+# ==========================================================
+#  LOKAL STAND-IN FOR VMIX TCP API (8099)
+# ==========================================================
+
+# mode: "ok" svarer OK på alt, "error" svarer ER for Input=99, "close_first"
+# lukker første forbindelse ved første kommando (uten svar), "hang" tar
+# imot men svarer aldri (vMix som henger / halvåpen forbindelse)
+def _fake_vmix_tcp_client(conn: socket.socket, mode: str = "ok", first: bool = False):
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    conn.sendall(b"VERSION OK 27.0.0.0\r\n")
+    buf = b""
+    with conn:
+        while True:
+            data = conn.recv(65536)
+            if not data:
+                return
+            buf += data
+            if mode == "hang":
+                buf = b""
+                continue
+            n = buf.count(b"\n")
+            if not n:
+                continue
+            if mode == "ok":
+                buf = buf[buf.rfind(b"\n") + 1:]
+                conn.sendall(b"FUNCTION OK Completed\r\n" * n)
+                continue
+            *lines, buf = buf.split(b"\n")
+            if mode == "close_first" and first:
+                return
+            conn.sendall(b"".join(
+                b"FUNCTION ER Input not found\r\n" if b"Input=99&" in line
+                else b"FUNCTION OK Completed\r\n"
+                for line in lines))
+
+
+def start_fake_vmix_tcp(mode: str = "ok"):
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(4)
+
+    def accept_loop():
+        first = True
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            threading.Thread(target=_fake_vmix_tcp_client, args=(conn, mode, first),
+                             daemon=True).start()
+            first = False
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return srv
+
+
+def wait_for(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("timeout i benchmark")
+        time.sleep(0)
+
+# ==========================================================
+#  BENCHMARK: TRANSPORTER
+# ==========================================================
+
+def bench_transport(count: int):
+    srv = start_fake_vmix_http()
+    host, port = srv.server_address
+
+    # Gammel oppførsel: ny requests.get (og ny TCP-forbindelse) per kall
+    url = f"http://{host}:{port}/api/"
+    samples = []
+    for i in range(count):
+        params = {
+            "Function": "SetText",
+            "Input": "17",
+            "SelectedName": "SHOTCLOCK.Text",
+            "Value": str(i % 25),
+        }
+        t0 = time.perf_counter()
+        requests.get(url, params=params, timeout=0.3)
+        samples.append(time.perf_counter() - t0)
+    summarize("requests.get per kall", samples)
+
+    # Ny oppførsel: VmixHttpTransport med keep-alive pool
+    transport = gw.VmixHttpTransport(host, port)
+    samples = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        transport.send("SetText", "17", "SHOTCLOCK.Text", str(i % 25))
+        samples.append(time.perf_counter() - t0)
+    summarize("VmixHttpTransport", samples)
+
+    transport.close()
+    srv.shutdown()
+
+    # TCP API: rundtur per kommando (send + vent på FUNCTION OK)
+    tcp_srv = start_fake_vmix_tcp()
+    host, port = tcp_srv.getsockname()
+    transport = gw.VmixTcpTransport(host, port)
+    samples = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        transport.send("SetText", "17", "SHOTCLOCK.Text", str(i % 25))
+        wait_for(lambda: transport.ok > i)
+        samples.append(time.perf_counter() - t0)
+    summarize("VmixTcpTransport rundtur", samples)
+
+    # TCP API: pipelinet – skriv alt, vent på siste svar
+    base = transport.ok
+    t0 = time.perf_counter()
+    for i in range(count):
+        transport.send("SetText", "17", "SHOTCLOCK.Text", str(i % 25))
+    wait_for(lambda: transport.ok >= base + count)
+    elapsed = time.perf_counter() - t0
+    print(f"{'VmixTcpTransport pipelinet':<28} n={count:<5} "
+          f"{elapsed / count * 1000.0:7.3f} ms/kommando  ({count / elapsed:,.0f}/s)")
+
+    transport.close()
+    tcp_srv.close()
+
+
+def check_tcp_transport() -> int:
+    """
+    Feilveiene i VmixTcpTransport + VmixSender mot fake vMix: ERROR-svar,
+    brudd med reconnect og catch-up, og vMix som henger. Returnerer antall feil.
+    """
+    failures = 0
+
+    def check(name: str, ok: bool, detail: str):
+        nonlocal failures
+        print(f"{'OK' if ok else 'FEIL':<5}{name:<34} {detail}")
+        failures += not ok
+
+    # ERROR-svar: on_lost for akkurat den kommandoen, resten kvitteres
+    srv = start_fake_vmix_tcp("error")
+    transport = gw.VmixTcpTransport(*srv.getsockname())
+    lost = []
+    transport.on_lost = lambda *cmd: lost.append(cmd)
+    transport.send("SetText", "99", "A_SCORE.Text", "1")
+    transport.send("SetText", "17", "B_SCORE.Text", "2")
+    wait_for(lambda: transport.ok + transport.errors >= 2)
+    check("ERROR-svar -> on_lost", lost == [("SetText", "99", "A_SCORE.Text")]
+          and transport.ok == 1, f"on_lost={lost} ok={transport.ok}")
+    transport.close()
+    srv.close()
+
+    # Brudd med kommando underveis: reconnect og samme verdi sendt på nytt
+    srv = start_fake_vmix_tcp("close_first")
+    transport = gw.VmixTcpTransport(*srv.getsockname())
+    sender = gw.VmixSender(transport, name="brudd")
+    fanout = gw.VmixFanout([sender])
+    fanout.start()
+    fanout.submit("17", "SetText", "A_SCORE.Text", "12", "home_score")
+    wait_for(lambda: transport.ok >= 1)
+    check("brudd -> reconnect + catch-up",
+          transport.reconnects == 2 and transport.lost == 1 and sender.caught_up == 1
+          and sender.healthy,
+          f"reconnects={transport.reconnects} lost={transport.lost} "
+          f"caught_up={sender.caught_up} healthy={sender.healthy}")
+    srv.close()
+
+    # Ukvitterte verdier er underveis, ikke i cachen, til fristen går ut
+    srv = start_fake_vmix_tcp("hang")
+    items = [("17", "SetText", f"F{i}.Text", str(i), f"f{i}") for i in range(50)]
+    transport = gw.VmixTcpTransport(*srv.getsockname(), ack_timeout=5.0)
+    sender = gw.VmixSender(transport, name="underveis")
+    fanout = gw.VmixFanout([sender])
+    fanout.start()
+    fanout.submit_many(items)
+    wait_for(lambda: len(transport._pending) == 50)
+    in_flight = len(sender._inflight)
+    transport.close()
+    check("ukvittert -> ikke i cache",
+          in_flight == 50 and not sender._cache and not sender._inflight,
+          f"underveis={in_flight} cache={len(sender._cache)} etter brudd={len(sender._inflight)}")
+
+    # vMix henger: fristen på eldste kommando kobler ned, ingenting hoper
+    # seg opp, og maskinen merkes nede
+    transport = gw.VmixTcpTransport(*srv.getsockname(), ack_timeout=0.1)
+    sender = gw.VmixSender(transport, name="henger", retry_interval=0.2)
+    fanout = gw.VmixFanout([sender])
+    fanout.start()
+    fanout.submit_many(items)
+    wait_for(lambda: not sender.healthy)
+    check("henger -> timeout + nede",
+          transport.timeouts >= 1 and len(transport._pending) < 50
+          and not sender._cache,
+          f"timeouts={transport.timeouts} pending={len(transport._pending)} "
+          f"cache={len(sender._cache)} failed={sender.failed}")
+    srv.close()
+    return failures
+
+# ==========================================================
+#  BENCHMARK: FRAMER
+# ==========================================================
+
+def make_frame(payload: bytes) -> bytes:
+    # SOH, adresse, STX, meldingsbyte, nyttelast, ETX
+    return b"\x01\x7f\x02G" + payload + b"\x03"
+
+
+def synthetic_stream(frames: int, seed: int = 1) -> bytes:
+    """Realistisk blanding: mye klokke/shot clock, litt score/fouls/navn."""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(frames):
+        r = rnd.random()
+        if r < 0.45:
+            mm, ss = divmod(600 - i % 600, 60)
+            out.append(make_frame(b"18" + b"0 " + f"{mm:02d}{ss:02d}".encode() + b"12  1"))
+        elif r < 0.85:
+            out.append(make_frame(b"50" + b"0" + f"{24 - i % 25:02d}".encode()))
+        elif r < 0.93:
+            out.append(make_frame(b"30" + b"0" + f"{i % 120:03d}{(i * 7) % 120:03d}".encode()))
+        elif r < 0.98:
+            out.append(make_frame(b"31" + b"00" + f"{i % 6}0{(i + 3) % 6}".encode()))
+        else:
+            out.append(make_frame(b"98" + b"HOME TEAM".ljust(18)))
+        # Litt søppel mellom frames, som på en ekte linje
+        if rnd.random() < 0.02:
+            out.append(b"\x00\xff")
+    return b"".join(out)
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def legacy_frames(chunks):
+    """Den gamle parse_stream_and_apply-løkka (uten print/apply)."""
+    buffer = b""
+    SOH, STX, ETX = 0x01, 0x02, 0x03
+    count = 0
+    for data in chunks:
+        buffer += data
+        while True:
+            start = buffer.find(bytes([SOH]))
+            if start == -1:
+                buffer = b""
+                break
+            end = buffer.find(bytes([ETX]), start + 1)
+            if end == -1:
+                if start > 0:
+                    buffer = buffer[start:]
+                break
+            frame = buffer[start:end + 1]
+            buffer = buffer[end + 1:]
+            stx_index = frame.find(bytes([STX]), 1, -1)
+            if stx_index == -1 or stx_index + 2 >= len(frame) - 1:
+                continue
+            frame[stx_index + 2:-1]
+            count += 1
+    return count
+
+
+def framer_frames(chunks):
+    framer = gw.BodetFramer()
+    count = 0
+    for data in chunks:
+        for _payload in framer.feed(data):
+            count += 1
+    return count
+
+
+def bench_framer(frames: int, stream: bytes = None):
+    if stream is None:
+        stream = synthetic_stream(frames)
+    print(f"Strøm: {len(stream):,} bytes")
+
+    # 1024 = vanlig recv(); store biter = backlog som tømmes etter reconnect
+    for chunk_size in (1024, 64 * 1024, len(stream)):
+        chunks = chunked(stream, chunk_size)
+        for name, fn in (("bytes (gammel)", legacy_frames), ("BodetFramer", framer_frames)):
+            t0 = time.perf_counter()
+            n = fn(chunks)
+            elapsed = time.perf_counter() - t0
+            print(f"  chunk={chunk_size:>9,}  {name:<16} {n:>7} frames  "
+                  f"{elapsed * 1000:9.2f} ms  {len(stream) / elapsed / 1e6:8.1f} MB/s")
+
+# ==========================================================
+#  BENCHMARK-SUITE: HOT PATHS
+# ==========================================================
+
+# Én representativ nyttelast per nid (samme format som synthetic_stream)
+NID_PAYLOADS = {
+    18: [b"180 " + f"{m:02d}{s:02d}".encode() + b"12  1" for m in range(10) for s in (0, 30, 59)],
+    30: [b"300" + f"{h:03d}{h + 3:03d}".encode() for h in range(0, 120, 2)],
+    31: [b"3100" + f"{i % 6}0{(i + 2) % 6}".encode() for i in range(12)],
+    32: [b"320" + "".join(str((i + p) % 6) for p in range(12)).encode() for i in range(6)],
+    33: [b"330" + "".join(str((i * p) % 6) for p in range(12)).encode() for i in range(6)],
+    34: [b"340" + "".join(f"{(i + p * 3) % 40:02d}" for p in range(12)).encode() for i in range(10)],
+    35: [b"350" + "".join(f"{(i * p) % 40:02d}" for p in range(12)).encode() for i in range(10)],
+    36: [b"360" + f"{s:02d}{t}".encode() for s in range(59, -1, -1) for t in (9, 5, 0)],
+    37: [b"370" + code for code in (b"1", b"2", b"0")],
+    38: [b"380" + f"{h}{a}".encode() for h in range(3) for a in range(3)],
+    50: [b"500" + f"{s:02d}".encode() for s in range(24, -1, -1)],
+    98: [name.ljust(18).encode() for name in (b"98HOME TEAM".decode(), "98HJEMMELAG BK")],
+    99: [name.ljust(18).encode() for name in ("99AWAY TEAM", "99BORTELAG IL")],
+}
+
+
+class NullTransport:
+    """Transport som kvitterer alt uten I/O – måler bare gatewayens egen kost."""
+
+    max_parallel = 1
+
+    def send(self, function, input_name, selected_name, value, on_ack=None):
+        if on_ack is not None:
+            on_ack()
+
+
+class ChunkConn:
+    """Socket-lignende objekt som leverer ferdige biter til parse_stream_and_apply."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def recv(self, _size: int) -> bytes:
+        return next(self._chunks, b"")
+
+
+def reset_gateway():
+    """Ny, tom bane som eneste bane, med NullTransport."""
+    # Senderen startes ikke: slots fylles (begrenset av antall felter),
+    # så vi måler kun produsentsiden av update_from_snapshot
+    sender = gw.VmixFanout([gw.VmixSender(NullTransport())])
+    court = gw.Court(gw.CONFIG["court_name"], gw.CONFIG, sender)
+    gw.COURTS[:] = [court]
+    gw.DEFAULT_COURT = court
+
+
+@contextlib.contextmanager
+def quiet():
+    """Hot path skriver til konsoll; send det til devnull under måling."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+MIN_REPEAT_S = 0.2
+
+
+def measure(fn, ops: int, repeat: int):
+    """
+    Kjører fn() repeat ganger med gc av og gir beste tid per op. Hver
+    repetisjon kjører fn() nok ganger til å vare minst MIN_REPEAT_S, så
+    korte benchmarks ikke drukner i støy. Minnetopp måles i en egen
+    kjøring under tracemalloc.
+    """
+    best = float("inf")
+    with quiet():
+        reset_gateway()
+        t0 = time.perf_counter()
+        fn()
+        loops = max(1, int(MIN_REPEAT_S / max(time.perf_counter() - t0, 1e-6)) + 1)
+
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                reset_gateway()
+                t0 = time.perf_counter()
+                for _ in range(loops):
+                    fn()
+                best = min(best, (time.perf_counter() - t0) / loops)
+        finally:
+            gc.enable()
+
+        reset_gateway()
+        tracemalloc.start()
+        fn()
+        _cur, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "ns_per_op": best / ops * 1e9,
+        "ops_per_s": ops / best,
+        "peak_kb": peak / 1024.0,
+    }
+
+
+def suite_cases(stream_frames: int, capture: str = None):
+    """Gir (navn, fn, antall ops) for alle hot paths."""
+    cases = []
+
+    stream = synthetic_stream(stream_frames)
+    chunks = chunked(stream, 1024)
+    cases.append(("parse_stream/syntetisk",
+                  lambda: gw.parse_stream_and_apply(ChunkConn(chunks)), stream_frames))
+    if capture:
+        cap_chunks = [data for _t, data in gw.read_capture(capture)]
+        cap_frames = framer_frames(cap_chunks)
+        cases.append(("parse_stream/capture",
+                      lambda: gw.parse_stream_and_apply(ChunkConn(cap_chunks)), cap_frames))
+
+    for nid, payloads in NID_PAYLOADS.items():
+        msgs = payloads * (2000 // len(payloads) + 1)
+
+        def run(msgs=msgs):
+            for msg in msgs:
+                gw.apply_bodet_message(0, msg)
+        cases.append((f"apply_bodet_message/{nid}", run, len(msgs)))
+
+    # Kun dekoderen (uten lås, state og vMix-diff)
+    for nid, payloads in NID_PAYLOADS.items():
+        decode = gw.BODET_DECODERS[nid].decode
+        msgs = payloads * (2000 // len(payloads) + 1)
+
+        def run(msgs=msgs, decode=decode):
+            for msg in msgs:
+                decode(msg)
+        cases.append((f"decode/{nid}", run, len(msgs)))
+
+    digits = [(h // 100, h // 10 % 10, h % 10, max(0, h - 2)) for h in range(0, 130)] * 50
+    def run_decode():
+        for d1, d2, d3, prev in digits:
+            gw.decode_score(d1, d2, d3, prev)
+    cases.append(("decode_score", run_decode, len(digits)))
+
+    states = []
+    for i in range(2000):
+        st = gw.ScoreState()
+        st.home.score = i // 20
+        st.away.score = i // 25
+        st.clock = f"{9 - i // 600 % 10:02d}:{59 - i // 10 % 60:02d}"
+        st.shot_clock = 24 - i // 10 % 25
+        states.append(st)
+    # Hel frame som i apply_bodet_message: publiser alle felt, rendre diffen
+    def run_update():
+        court = gw.DEFAULT_COURT
+        for st in states:
+            with court.lock:
+                court.state = st
+                snap = court.publish()
+            court.vmix.update_from_snapshot(snap)
+    cases.append(("update_from_snapshot/alle felt", run_update, len(states)))
+
+    def run_publish():
+        court = gw.DEFAULT_COURT
+        for st in states:
+            court.state = st
+            court.publish()
+    cases.append(("Court.publish", run_publish, len(states)))
+
+    # Sjekkpunktet som skrives ved hver publiserte endring
+    checkpoint = gw.StateCheckpoint(os.path.join(tempfile.mkdtemp(), "state.bin"))
+    last_sent = {"home": 0, "away": 0}
+    def run_checkpoint():
+        for st in states:
+            checkpoint.write(st, last_sent)
+    cases.append(("StateCheckpoint.write", run_checkpoint, len(states)))
+
+    # Tickerens vanlige tilfelle: kun shot clock endret siden forrige bilde
+    def run_incremental():
+        court = gw.DEFAULT_COURT
+        for i in range(2000):
+            with court.lock:
+                court.state.shot_clock = 24 - i % 25
+                snap = court.publish(("shot_clock",))
+            court.vmix.update_from_snapshot(snap)
+    cases.append(("VmixClient.update_from_snapshot", run_incremental, 2000))
+
+    return cases
+
+
+def bench_suite(args):
+    results = {}
+    for name, fn, ops in suite_cases(args.frames, args.capture):
+        results[name] = measure(fn, ops, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'benchmark':<32} {'ns/op':>10} {'ops/s':>12} {'peak KB':>9}")
+    for name, r in results.items():
+        line = (f"{name:<32} {r['ns_per_op']:>10.0f} {r['ops_per_s']:>12,.0f} "
+                f"{r['peak_kb']:>9.1f}")
+        if baseline and name in baseline:
+            change = r["ns_per_op"] / baseline[name]["ns_per_op"] - 1.0
+            flag = "  REGRESJON" if change > args.threshold else ""
+            regressions += bool(flag)
+            line += f"  {change * 100:+6.1f}%{flag}"
+        print(line)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=2)
+        print(f"Lagret til {args.json}")
+
+    if regressions:
+        print(f"{regressions} benchmark(s) tregere enn {args.threshold * 100:.0f}% terskel")
+        sys.exit(1)
+
+# ==========================================================
+#  FUZZ: DEKODERE OG APPLY
+# ==========================================================
+
+def mutate(rnd: random.Random, msg: bytes) -> bytes:
+    """Avkorting, bytefeil, innsetting eller tilfeldig hale etter nid."""
+    m = bytearray(msg)
+    op = rnd.random()
+    if op < 0.25:
+        del m[rnd.randrange(len(m) + 1):]
+    elif op < 0.55:
+        for _ in range(rnd.randrange(1, 4)):
+            if m:
+                m[rnd.randrange(len(m))] = rnd.randrange(256)
+    elif op < 0.7:
+        pos = rnd.randrange(len(m) + 1)
+        m[pos:pos] = bytes(rnd.randrange(256) for _ in range(rnd.randrange(1, 6)))
+    elif op < 0.9:
+        m = m[:2] + bytes(rnd.randrange(256) for _ in range(rnd.randrange(40)))
+    else:
+        m = bytes(rnd.randrange(256) for _ in range(rnd.randrange(40)))
+    return bytes(m)
+
+
+def bench_fuzz(count: int, seed: int):
+    """
+    Kjører muterte meldinger gjennom hver dekoder og apply_bodet_message.
+    Feiler (exit 1) hvis noe kaster, en post ikke har handler, eller
+    state får verdier layouten ikke kan vise.
+    """
+    rnd = random.Random(seed)
+    seeds = [msg for payloads in NID_PAYLOADS.values() for msg in payloads]
+    seeds += [bytes(p) for p in gw.BodetFramer().feed(synthetic_stream(500, seed))]
+    failures = 0
+    per_nid = {}
+
+    with quiet():
+        reset_gateway()
+    court = gw.DEFAULT_COURT
+    t0 = time.perf_counter()
+    for i in range(count):
+        msg = mutate(rnd, rnd.choice(seeds))
+        try:
+            changes = gw.decode_bodet_message(msg)
+            for change in changes:
+                if type(change) not in gw.CHANGE_HANDLERS:
+                    raise TypeError(f"ingen handler for {type(change).__name__}")
+            gw.apply_bodet_message(0, memoryview(msg))
+            state = court.state
+            for team in (state.home, state.away):
+                if not (0 <= team.score <= 999 and 0 <= team.fouls <= 9):
+                    raise ValueError(f"ugyldig lagstate {team}")
+            if state.possession not in ("", "home", "away"):
+                raise ValueError(f"ugyldig possession {state.possession!r}")
+            gw.state_view(state, court.overrides)
+        except Exception as e:
+            failures += 1
+            if failures <= 10:
+                print(f"  FEIL #{i}: {msg!r}: {type(e).__name__}: {e}")
+        if len(msg) >= 2:
+            nid = (msg[0] - 48) * 10 + (msg[1] - 48)
+            if nid in gw.BODET_DECODERS:
+                per_nid[nid] = per_nid.get(nid, 0) + 1
+    elapsed = time.perf_counter() - t0
+
+    print(f"Fuzz: {count:,} meldinger (seed {seed}) på {elapsed:.2f} s, {failures} feil")
+    print("  per nid: " + ", ".join(f"{nid}={n}" for nid, n in sorted(per_nid.items())))
+    if failures:
+        sys.exit(1)
+
+# ==========================================================
+#  BENCHMARK: OPPSTART (HEADLESS)
+# ==========================================================
+
+# Barneprosessen kjører headless main() med en konfigurasjonsfil som
+# peker banen og vMix mot lokale porter (og slår av sjekkpunktet)
+STARTUP_CHILD = 'import bodet_to_vmix_gui as gw; gw.main(["--headless"])'
+
+
+class _CountingVmixHandler(_FakeVmixHandler):
+    first_request = None    # monotonic for første kall, settes av benchmarken til None
+
+    def do_GET(self):
+        if _CountingVmixHandler.first_request is None:
+            _CountingVmixHandler.first_request = time.monotonic()
+        super().do_GET()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _can_connect(port: int) -> bool:
+    # Pollingen skal ikke stjele CPU fra gatewayen som startes
+    time.sleep(0.001)
+    try:
+        socket.create_connection(("127.0.0.1", port), timeout=0.05).close()
+        return True
+    except OSError:
+        return False
+
+
+def _time_process(code: str) -> float:
+    t0 = time.monotonic()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.monotonic() - t0
+
+
+def bench_startup(runs: int):
+    """
+    Starter gatewayen headless som egen prosess og måler tiden til
+    Scorepad-porten tar imot tilkoblinger og til første vMix-kall
+    (startgrafikken). Som referanse: tom Python og ren import.
+    """
+    fake = start_fake_vmix_http(_CountingVmixHandler)
+    vmix_port = fake.server_address[1]
+    cfg_path = os.path.join(tempfile.mkdtemp(), "bodet_gateway.json")
+    env = dict(os.environ, BODET_GATEWAY_CONFIG=cfg_path)
+    listen, first_vmix = [], []
+    for _ in range(runs):
+        port = _free_port()
+        _CountingVmixHandler.first_request = None
+        cfg = {"listen_host": "127.0.0.1", "listen_port": port, "metrics_port": 0,
+               "vmix_host": "127.0.0.1", "vmix_port": vmix_port, "vmix_transport": "http",
+               "state_checkpoint": ""}
+        with open(cfg_path, "w", encoding="utf-8") as f:
+            json.dump(cfg, f)
+        t0 = time.monotonic()
+        child = subprocess.Popen([sys.executable, "-c", STARTUP_CHILD], env=env,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(lambda: _can_connect(port) or child.poll() is not None, timeout=10.0)
+            if child.poll() is not None:
+                raise RuntimeError(f"gatewayen avsluttet med kode {child.returncode}")
+            listen.append(time.monotonic() - t0)
+            wait_for(lambda: _CountingVmixHandler.first_request is not None
+                     or time.sleep(0.001), timeout=10.0)
+            first_vmix.append(_CountingVmixHandler.first_request - t0)
+        finally:
+            child.terminate()
+            child.wait()
+
+    python = [_time_process("pass") for _ in range(runs)]
+    imports = [_time_process("import bodet_to_vmix_gui") for _ in range(runs)]
+    os.remove(cfg_path)
+
+    print(f"Headless oppstart, {runs} kjøringer (fra prosessstart):")
+    summarize("python uten gateway", python)
+    summarize("import bodet_to_vmix_gui", imports)
+    summarize("Scorepad-port lytter", listen)
+    summarize("første vMix-kall", first_vmix)
+    fake.shutdown()
+
+# ==========================================================
+#  MAIN
+# ==========================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for Bodet → vMix gateway")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("transport", help="vMix-latens: requests.get, keep-alive og TCP API")
+    p.add_argument("-n", "--count", type=int, default=500)
+    p.add_argument("--checks-only", action="store_true",
+                   help="kun feilveiene (ERROR-svar, brudd, vMix som henger)")
+
+    p = sub.add_parser("framer", help="framing-gjennomstrømning ved bursts")
+    p.add_argument("-n", "--frames", type=int, default=50000)
+    p.add_argument("--capture", help=".bdcap-opptak i stedet for syntetisk strøm")
+
+    p = sub.add_parser("fuzz", help="muterte Bodet-meldinger mot dekodere og apply")
+    p.add_argument("-n", "--count", type=int, default=100000)
+    p.add_argument("--seed", type=int, default=1)
+
+    p = sub.add_parser("startup", help="headless oppstart: tid til port og første vMix-kall")
+    p.add_argument("-n", "--runs", type=int, default=10)
+
+    p = sub.add_parser("suite", help="gjennomstrømning/minne for alle hot paths")
+    p.add_argument("-n", "--frames", type=int, default=20000, help="frames i syntetisk strøm")
+    p.add_argument("-r", "--repeat", type=int, default=7)
+    p.add_argument("--capture", help="kjør også parse_stream på et .bdcap-opptak")
+    p.add_argument("--json", help="lagre resultater for senere --compare")
+    p.add_argument("--compare", help="JSON fra tidligere kjøring å sammenligne mot")
+    p.add_argument("--threshold", type=float, default=0.10,
+                   help="relativ nedgang som regnes som regresjon (0.10 = 10%%)")
+
+    args = parser.parse_args()
+    if args.bench == "transport":
+        if not args.checks_only:
+            bench_transport(args.count)
+        if check_tcp_transport():
+            sys.exit(1)
+    elif args.bench == "framer":
+        stream = None
+        if args.capture:
+            stream = b"".join(data for _t, data in gw.read_capture(args.capture))
+        bench_framer(args.frames, stream)
+    elif args.bench == "fuzz":
+        bench_fuzz(args.count, args.seed)
+    elif args.bench == "startup":
+        bench_startup(args.runs)
+    elif args.bench == "suite":
+        bench_suite(args)
+
+
+if __name__ == "__main__":
+    main()
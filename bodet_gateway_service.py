@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Headless oppstart av gatewayen for tjenestestyrere (systemd, NSSM o.l.).
+
+Samme som `python bodet_to_vmix_gui.py --headless`, men gatewayen lastes
+som modul, så Python bruker den kompilerte .pyc-en i stedet for å
+kompilere hele skriptet på nytt ved hver oppstart.
+
+    python bodet_gateway_service.py
+    python bodet_gateway_service.py --headless   # (valgfritt, alltid headless)
+"""
+
+import sys
+
+from bodet_to_vmix_gui import main
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if "--headless" not in argv:
+        argv.append("--headless")
+    main(argv)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Spiller av et Scorepad-opptak (.bdcap) mot gatewayen, som om det var
+en ekte Bodet Scorepad.
+
+Opptak lages ved å sette CONFIG["capture_dir"] i bodet_to_vmix_gui.py.
+
+    python bodet_replay.py kamp.bdcap                 # sanntid
+    python bodet_replay.py kamp.bdcap --speed 10      # 10x fart
+    python bodet_replay.py kamp.bdcap --fast          # så fort som mulig
+"""
+
+import argparse
+import socket
+import time
+
+from bodet_to_vmix_gui import read_capture
+
+# ==========================================================
+#  REPLAY
+# ==========================================================
+
+def replay(path: str, host: str, port: int, speed: float, fast: bool) -> None:
+    sock = socket.create_connection((host, port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    print(f"[REPLAY] Tilkoblet {host}:{port}, spiller av {path} "
+          f"({'maks fart' if fast else f'{speed:g}x'})")
+
+    chunks = 0
+    total = 0
+    start = time.monotonic()
+    try:
+        for t, data in read_capture(path):
+            if not fast:
+                # Sov til postens tidspunkt (skalert) – ikke akkumulert drift
+                delay = start + t / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            sock.sendall(data)
+            chunks += 1
+            total += len(data)
+    finally:
+        sock.close()
+
+    elapsed = time.monotonic() - start
+    print(f"[REPLAY] Ferdig: {chunks} biter, {total:,} bytes på {elapsed:.2f} s "
+          f"({total / elapsed / 1e3 if elapsed else 0:,.1f} kB/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spill av Bodet Scorepad-opptak mot gatewayen")
+    parser.add_argument("capture", help=".bdcap-fil")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4001)
+    parser.add_argument("--speed", type=float, default=1.0, help="avspillingsfart, f.eks. 10 = 10x")
+    parser.add_argument("--fast", action="store_true", help="ignorer tidsstempler, send alt med en gang")
+    args = parser.parse_args()
+
+    if args.speed <= 0:
+        parser.error("--speed må være > 0")
+
+    replay(args.capture, args.host, args.port, args.speed, args.fast)
+
+
+if __name__ == "__main__":
+    main()
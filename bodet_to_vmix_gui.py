@@ -1,28 +1,174 @@
 #!/usr/bin/env python3
+import time
+STARTED_AT = time.monotonic()   # for oppstartsmåling (lytter etter N ms)
+
+import argparse
+import atexit
+import bisect
+import copy
+import functools
+import io
+import json
+import logging
+import logging.handlers
+import math
+import mmap
+import queue
+import signal
 import socket
+import struct
+import sys
 import threading
-import time
+import zlib
 from dataclasses import dataclass, field
-from typing import Dict, Any
-import requests
-import tkinter as tk
-from tkinter import ttk
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, Any, Tuple, Callable, Iterator, Mapping, NamedTuple
+from urllib.parse import quote
 import os
 
+# Tunge moduler importeres der de brukes, så en headless gateway binder
+# Scorepad-porten før de er lastet: asyncio (kun asyncio-kjernen),
+# requests (første HTTP-kall mot vMix), tkinter (GUI), http.server
+# (metrikk-endepunktet), xml.etree (avstemming), concurrent.futures
+# (første parallelle flush).
+if TYPE_CHECKING:
+    import asyncio   # kun for annotasjonene
+
 # ==========================================================
 #  KONFIGURASJON
 # ==========================================================
 
+# Verdiene under er standardverdier. En JSON-fil (CONFIG_FILE) overstyrer
+# dem ved oppstart og overvåkes mens gatewayen går; se KONFIGURASJONSFIL.
 CONFIG = {
     # Lytter på alle interfaces, port 4001, for Bodet "TV Protocol"
     "listen_host": "0.0.0.0",
     "listen_port": 4001,
 
+    # Flere baner i én prosess. Verdiene i CONFIG er første bane; hver
+    # oppføring i "courts" er en ekstra bane som arver alt herfra og
+    # overstyrer det som er ulikt (minst listen_port og vmix_input).
+    # Alle baner deler sender og vMix-forbindelser.
+    "court_name": "Bane 1",
+    "courts": [
+        # {"name": "Bane 2", "listen_port": 4002, "vmix_input": "18"},
+    ],
+
+    # Hvor ofte konfigurasjonsfilen sjekkes for endringer (sekunder)
+    "config_poll_interval": 1.0,
+
+    # "threads" = én tråd per oppgave, én Scorepad om gangen.
+    # "asyncio" = lytter, framing, ticker, sender og statistikk som tasks
+    # på én event-loop, med flere samtidige Scorepad-tilkoblinger.
+    "core": "threads",
+
+    # Sjekkpunkt av state (mmap, fast layout) som skrives ved hver endring
+    # og leses ved oppstart, så scorebugen er riktig etter en krasj før
+    # første Bodet-frame. Relativ sti = ved siden av skriptet; ekstra baner
+    # får _<listen_port> i navnet. Tom streng = av.
+    "state_checkpoint": "bodet_state.bin",
+    # Sjekkpunkt eldre enn dette (sekunder) ignoreres ved oppstart, så en
+    # omstart før neste kamp ikke sender forrige kamp på lufta.
+    "state_checkpoint_max_age": 900.0,
+
+    # Opptak av rå Scorepad-trafikk (for replay/lasttest med bodet_replay.py).
+    # Tom streng = av. Ellers skrives én .bdcap-fil per tilkobling hit.
+    "capture_dir": "",
+
+    # Latensmåling recv() -> vMix-kvittering. Oppsummering skrives av
+    # debug_printer; JSON-dump hit hvis satt (tom streng = av).
+    "latency_tracing": True,
+    "latency_budget_ms": 40.0,   # én videoframe ved 25p
+    "latency_dump_path": "",
+
+    # Metrikker i Prometheus-tekstformat på http://metrics_host:metrics_port/metrics
+    # (0 = av). Tellerne går alltid; porten slår på endepunktet og måling
+    # av vente- og holdetid på banenes state-lås.
+    "metrics_host": "127.0.0.1",
+    "metrics_port": 9108,
+
+    # Lokal klokkemodell: avvik større enn snap_threshold (sek) settes
+    # hardt, mindre avvik svinges inn over slew_time (sek). Mens klokka
+    # går settes den bare hardt opp ved hopp over clock_jump_threshold
+    # (operatør la til tid); forsinkede frames holdes/svinges inn.
+    "clock_snap_threshold": 0.5,
+    "clock_slew_time": 1.0,
+    "clock_jump_threshold": 3.0,
+
+    # Logging: standardnivå + nivå per delsystem (tcp, raw, bodet, parse,
+    # event, vmix, fouls, capture, stats, main). Per-bit/per-frame/per-felt
+    # utskrift ligger på DEBUG og er tilnærmet gratis når den er av.
+    "log_level": "INFO",
+    "log_levels": {
+        "tcp": "INFO",      # "DEBUG" = hver mottatt TCP-bit
+        "raw": "INFO",      # "DEBUG" = hver rå frame
+        "bodet": "INFO",    # "DEBUG" = hex-dump av hver kjente melding
+        "vmix": "INFO",     # "DEBUG" = hver feltendring mot vMix
+        "fouls": "INFO",    # "DEBUG" = hver SetImage for fouls
+    },
+
     # vMix-tilkobling
     "vmix_host": "192.168.100.75",
     "vmix_port": 8088,
     "vmix_input": "17",  # ENBL_SCORE_BUG.gtzip
 
+    # "http" = Web API (vmix_port), "tcp" = TCP API (vmix_tcp_port)
+    "vmix_transport": "http",
+    "vmix_tcp_port": 8099,
+    # TCP: svarer ikke vMix på eldste utestående kommando innen dette
+    # (sekunder), regnes forbindelsen som hengt og kobles opp på nytt
+    "vmix_tcp_ack_timeout": 1.0,
+
+    # HTTP keep-alive mot vMix: antall gjenbrukte forbindelser og
+    # timeout (sekunder) for hhv. oppkobling og svar
+    "vmix_http_pool_size": 4,
+    "vmix_connect_timeout": 0.3,
+    "vmix_read_timeout": 0.3,
+
+    # Primær + backup vMix: hver oppføring er en ekstra maskin som får de
+    # samme kommandoene og arver vmix_*-verdiene over (minst vmix_host).
+    # Hver maskin har egen tråd, forbindelse, cache og helse; en maskin
+    # som har vært nede får kun feltene den gikk glipp av, og prøves
+    # igjen hvert vmix_retry_interval sekund. En maskin regnes som nede
+    # først etter vmix_down_after feil på rad; før det sendes feilede
+    # felt på nytt som vanlig (én timeout skal ikke fryse grafikken).
+    "vmix_name": "primary",
+    "vmix_destinations": [
+        # {"name": "backup", "vmix_host": "192.168.100.76"},
+    ],
+    "vmix_retry_interval": 2.0,
+    "vmix_down_after": 3,
+
+    # Avstemming: hent vMix sin XML-tilstand hvert N sekund og send på
+    # nytt kun felter som avviker fra det som skal vises (0 = av)
+    "vmix_reconcile_interval": 10.0,
+
+    # Strupning per vMix-maskin. vMix rendrer kun med produksjonens
+    # framerate, så klokkene trenger ikke flere oppdateringer enn det.
+    #   vmix_field_rate:      maks oppdateringer/s per logisk felt (mangler = fri)
+    #   vmix_rps_budget:      maks kommandoer/s totalt (0 = fri)
+    #   vmix_throttle_bypass: felter som alltid går rett ut
+    # Det som holdes igjen slås sammen: kun siste verdi sendes.
+    "vmix_field_rate": {
+        "game_clock": 25,
+        "shot_clock": 25,
+    },
+    "vmix_rps_budget": 100,
+    "vmix_throttle_bypass": ["home_score", "away_score", "home_fouls", "away_fouls"],
+
+    # Prioritet i vMix-senderen per logisk felt: "score" sendes før
+    # "clock", som sendes før "other" (navn, periode, kosmetikk).
+    "vmix_priority": {
+        "home_score": "score",
+        "away_score": "score",
+        "home_fouls": "score",
+        "away_fouls": "score",
+        "game_clock": "clock",
+        "shot_clock": "clock",
+    },
+
     # Mapping fra "logiske" felter -> GT SelectedName fra XML
     "fields": {
         # Lagnavn
@@ -41,7 +187,11 @@ CONFIG = {
         "shot_clock":       "SHOTCLOCK.Text",
     },
 
-    # Fouls-bilder
+    # Fouls-bilder (SelectedName per lag)
+    "fouls_fields": {
+        "A": "A_FAULS.Source",
+        "B": "B_FAULS.Source",
+    },
     # 0 fouls → 0.png for begge lag
     # A: a1.png .. a5.png
     # B: b1.png .. b5.png
@@ -64,8 +214,188 @@ CONFIG = {
             5: "b5.png",
         },
     },
+
+    # Ekstra bindinger utover fields og fouls-bildene. Hver binder ett
+    # logisk felt (home_score, shot_clock, shot_running, home_fouls,
+    # home_timeouts, possession, home_possession, home_player4_fouls,
+    # away_player7_points, ...) til ett element i tittelen:
+    #   kind:   "text" (SetText), "image" (SetImage), "colour" (SetColor)
+    #           eller "visible" (SetTextVisibleOn/Off, SetImageVisibleOn/Off)
+    #   values: verdi -> vMix-verdi (bilde, farge, tekst)
+    #   fmt:    for verdier som ikke står i values ("{}" = verdien selv)
+    "layout": [
+        # {"field": "shot_clock", "kind": "colour", "name": "SHOTCLOCK_BG.Fill.Color",
+        #  "values": {0: "#C00000FF"}, "fmt": "#000000FF"},
+        # {"field": "shot_running", "kind": "visible", "name": "SHOTCLOCK.Text"},
+    ],
 }
 
+# ==========================================================
+#  LOGGING
+# ==========================================================
+
+log_main = logging.getLogger("bodet.main")
+log_tcp = logging.getLogger("bodet.tcp")
+log_raw = logging.getLogger("bodet.raw")
+log_parse = logging.getLogger("bodet.parse")
+log_bodet = logging.getLogger("bodet.bodet")
+log_event = logging.getLogger("bodet.event")
+log_vmix = logging.getLogger("bodet.vmix")
+log_fouls = logging.getLogger("bodet.fouls")
+log_capture = logging.getLogger("bodet.capture")
+log_stats = logging.getLogger("bodet.stats")
+
+_log_listener = None
+
+
+def setup_logging(cfg: Dict[str, Any] = None):
+    """
+    Setter nivåer fra cfg["log_level"] / cfg["log_levels"] og (første
+    gang) kobler på en købasert skriver: hot path legger bare LogRecords
+    i en kø, og én bakgrunnstråd skriver til konsollen. Trygg å kalle
+    på nytt for å endre nivåer.
+    """
+    global _log_listener
+    cfg = cfg or CONFIG
+
+    root = logging.getLogger("bodet")
+    root.setLevel(cfg.get("log_level", "INFO"))
+    for name, level in cfg.get("log_levels", {}).items():
+        logging.getLogger(f"bodet.{name}").setLevel(level)
+
+    if _log_listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(asctime)s.%(msecs)03d %(message)s", "%H:%M:%S"))
+    _log_listener = logging.handlers.QueueListener(log_queue, handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.propagate = False
+
+# ==========================================================
+#  KONFIGURASJONSFIL (JSON over standardverdiene)
+# ==========================================================
+
+# BODET_GATEWAY_CONFIG kan peke et annet sted; mangler filen brukes CONFIG
+CONFIG_FILE = (os.environ.get("BODET_GATEWAY_CONFIG")
+               or os.path.join(os.path.dirname(os.path.abspath(__file__)), "bodet_gateway.json"))
+
+CONFIG_DEFAULTS = copy.deepcopy(CONFIG)   # før filen legges på
+
+
+def merge_config(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ny konfigurasjon: base med overrides lagt på. Ordbøker (fields,
+    log_levels, vmix_priority, ...) flettes ett nivå ned, så filen bare
+    trenger nøklene som er ulike; alt annet erstattes helt.
+    """
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if key not in base:
+            log_main.warning("[CONFIG] Ukjent nøkkel '%s' i konfigurasjonsfilen", key)
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merged[key] = {**base[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+def config_stamp(path: str):
+    """(mtime, størrelse) for filen, None hvis den ikke finnes."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _coerce(key: str, value: Any, default: Any) -> Any:
+    """value som samme type som standardverdien; ValueError hvis det ikke går."""
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise ValueError(f"{key} må være true/false, ikke {value!r}")
+        return value
+    if isinstance(default, (int, float)):
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f"{key} må være et tall, ikke {value!r}")
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"{key} må være et tall, ikke {value!r}") from None
+        if not math.isfinite(number) or number < 0:
+            raise ValueError(f"{key} må være et tall >= 0, ikke {value!r}")
+        if isinstance(default, int):
+            if not number.is_integer():
+                raise ValueError(f"{key} må være et heltall, ikke {value!r}")
+            return int(number)
+        return number
+    if isinstance(default, str):
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError(f"{key} må være en tekst, ikke {value!r}")
+        return value if isinstance(value, str) else str(value)
+    if isinstance(default, dict):
+        if not isinstance(value, dict):
+            raise ValueError(f"{key} må være et objekt, ikke {value!r}")
+        # Verdiene får typen til standardverdiene (rater som tall, navn som
+        # tekst; null = feltet er av). Nøstede objekter sjekkes av brukeren.
+        sample = next(iter(default.values()), None)
+        if sample is None or isinstance(sample, (dict, list)):
+            return value
+        if isinstance(sample, int) and not isinstance(sample, bool):
+            sample = float(sample)
+        return {k: None if v is None else _coerce(f"{key}.{k}", v, sample)
+                for k, v in value.items()}
+    if isinstance(default, list) and not isinstance(value, list):
+        raise ValueError(f"{key} må være en liste, ikke {value!r}")
+    return value
+
+
+def validate_config(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ny konfigurasjon med tall, tekst og struktur sjekket og tvunget til
+    standardverdienes typer, også i "courts" og "vmix_destinations".
+    Kaster ValueError ved første ugyldige verdi, før noe er tatt i bruk.
+    """
+    out = dict(cfg)
+    for key, default in CONFIG_DEFAULTS.items():
+        if key in out:
+            out[key] = _coerce(key, out[key], default)
+    for key in ("courts", "vmix_destinations"):
+        entries = []
+        for i, entry in enumerate(out.get(key, [])):
+            if not isinstance(entry, dict):
+                raise ValueError(f"{key}[{i}] må være et objekt, ikke {entry!r}")
+            entries.append({k: _coerce(f"{key}[{i}].{k}", v, CONFIG_DEFAULTS[k])
+                            if k in CONFIG_DEFAULTS else v for k, v in entry.items()})
+        out[key] = entries
+    for i, extra in enumerate(out.get("layout", [])):
+        if not isinstance(extra, dict):
+            raise ValueError(f"layout[{i}] må være et objekt, ikke {extra!r}")
+    for level in (out.get("log_level", "INFO"), *out.get("log_levels", {}).values()):
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"ukjent loggnivå {level!r}")
+    return out
+
+
+def load_config_file(path: str) -> Dict[str, Any]:
+    """Standardverdiene med filen lagt på. Kaster ved ugyldig JSON eller verdi."""
+    with open(path, "r", encoding="utf-8") as f:
+        overrides = json.load(f)
+    if not isinstance(overrides, dict):
+        raise ValueError("konfigurasjonsfilen må være et JSON-objekt")
+    return validate_config(merge_config(CONFIG_DEFAULTS, overrides))
+
+
+if config_stamp(CONFIG_FILE) is not None:
+    try:
+        CONFIG.update(load_config_file(CONFIG_FILE))
+    except (OSError, ValueError) as e:
+        log_main.error("[CONFIG] Kunne ikke lese %s, bruker standardverdier: %s", CONFIG_FILE, e)
+
 # ==========================================================
 #  STATE / OVERRIDES
 # ==========================================================
@@ -82,6 +412,10 @@ class TeamState:
     period_fouls: int = 0
     timeouts: int = 0
 
+    # Per spiller, i rekkefølgen Scorepad sender dem (tom = ikke mottatt)
+    player_fouls: Tuple[int, ...] = ()
+    player_points: Tuple[int, ...] = ()
+
 
 @dataclass
 class ScoreState:
@@ -90,539 +424,3400 @@ class ScoreState:
     period: int = 1
     shot_clock: int = 24
 
-    # Numerisk tid i sekunder (for lokal nedtelling)
-    clock_seconds: float = 600.0    # 10:00
-    shot_seconds: float = 24.0
+    # Numerisk tid i sekunder (for lokal nedtelling)
+    clock_seconds: float = 600.0    # 10:00
+    shot_seconds: float = 24.0
+
+    # RUN/flagg (fra Bodet-status)
+    clock_running: bool = False
+    shot_running: bool = False
+
+    home: TeamState = field(default_factory=TeamState)
+    away: TeamState = field(default_factory=TeamState)
+
+    to_home: int = 0
+    to_away: int = 0
+
+    # Ballbesittelse: "home", "away" eller "" (ingen/ukjent)
+    possession: str = ""
+
+
+@dataclass
+class Overrides:
+    # Hvis disse ikke er tomme brukes de i stedet for Bodet-navn
+    home_name: str = ""
+    away_name: str = ""
+
+    # Player overrides per lag: draktnummer -> navn (for fremtidige overlays)
+    players_home: Dict[int, str] = field(default_factory=dict)
+    players_away: Dict[int, str] = field(default_factory=dict)
+
+    # Flagg: bruk override-navn når de faktisk er satt
+    force_team_names: bool = True
+    force_player_names: bool = True
+
+
+_MISSING = object()
+
+
+class StateSnapshot:
+    """
+    Uforanderlig bilde av én banes logiske felt (state_fields) med
+    versjonsnummer. Skriverne publiserer et nytt bilde under banens lås
+    (Court.publish); lesere (vMix, GUI, statistikk) tar court.snapshot
+    uten lås og kan beholde det så lenge de vil.
+
+    versions holder versjonen hvert felt sist ble endret i, så
+    changed_since(n) svarer på "hva er nytt siden jeg så versjon n";
+    changed er feltene som ble endret i akkurat denne versjonen.
+    """
+
+    __slots__ = ("version", "values", "versions", "changed", "_values")
+
+    def __init__(self, version: int, values: Dict[str, Any], versions: Dict[str, int],
+                 changed: Tuple[str, ...] = ()):
+        # Dictene eies av bildet og endres aldri; utad kun som read-only view
+        self.version = version
+        self._values = values
+        self.values: Mapping[str, Any] = MappingProxyType(values)
+        self.versions: Mapping[str, int] = MappingProxyType(versions)
+        self.changed = changed
+
+    @classmethod
+    def initial(cls, values: Dict[str, Any]) -> "StateSnapshot":
+        return cls(0, values, dict.fromkeys(values, 0), tuple(values))
+
+    def get(self, logical: str, default=None):
+        return self.values.get(logical, default)
+
+    def changed_since(self, version: int) -> Tuple[str, ...]:
+        if version >= self.version:
+            return ()
+        return tuple(logical for logical, v in self.versions.items() if v > version)
+
+    def next(self, values: Dict[str, Any]) -> "StateSnapshot":
+        """Bilde med values som neste versjon; self hvis ingenting er endret."""
+        old = self._values
+        if values == old:
+            return self
+        changed = [logical for logical, value in values.items()
+                   if old.get(logical, _MISSING) != value]
+        if not values.keys() >= old.keys():
+            # Felt som er borte (f.eks. kortere spillerliste) regnes som endret
+            changed += [logical for logical in old if logical not in values]
+        return self._successor(values, changed)
+
+    def update(self, partial: Dict[str, Any]) -> "StateSnapshot":
+        """Som next(), men kun feltene i partial kan ha endret seg."""
+        old = self._values
+        changed = [logical for logical, value in partial.items()
+                   if old.get(logical, _MISSING) != value]
+        if not changed:
+            return self
+        values = dict(old)
+        values.update(partial)
+        return self._successor(values, changed)
+
+    def _successor(self, values: Dict[str, Any], changed) -> "StateSnapshot":
+        version = self.version + 1
+        versions = dict(self.versions)
+        for logical in changed:
+            versions[logical] = version
+        return StateSnapshot(version, values, versions, tuple(changed))
+
+
+# ==========================================================
+#  LATENSMÅLING (recv -> vMix-kvittering)
+# ==========================================================
+
+class FrameTrace:
+    """
+    Tidsstempler (time.monotonic) for én Bodet-frame gjennom gatewayen:
+    recv() returnerte, framen var dekodet (framing + decode_bodet_message),
+    state var oppdatert og vMix-diffen laget, og feltene lå i senderens kø.
+    """
+
+    __slots__ = ("t_recv", "t_decode", "t_apply", "t_enqueue")
+
+    def __init__(self, t_recv: float):
+        self.t_recv = t_recv
+        self.t_decode = t_recv   # settes av apply_bodet_message etter dekoding
+        self.t_apply = 0.0
+        self.t_enqueue = 0.0
+
+
+class LatencyStats:
+    """Rullerende vindu med latenser (sekunder) per nøkkel, med p50/p95/p99."""
+
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, key: str, seconds: float):
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples.setdefault(key, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for key, samples in list(self._samples.items()):
+            values = sorted(samples)
+            n = len(values)
+            if not n:
+                continue
+            out[key] = {
+                "n": n,
+                "p50_ms": values[n // 2] * 1000.0,
+                "p95_ms": values[min(n - 1, int(n * 0.95))] * 1000.0,
+                "p99_ms": values[min(n - 1, int(n * 0.99))] * 1000.0,
+                "max_ms": values[-1] * 1000.0,
+            }
+        return out
+
+
+class LatencyTracer:
+    """
+    Samler latens per steg og per logisk felt.
+
+    Steg: recv->decode (framing), decode->apply (state + vMix-diff),
+    apply->enqueue (inn i senderen), enqueue->ack (kø + vMix).
+    Per felt: recv->ack for felter som kom fra en Bodet-frame.
+    """
+
+    STAGES = ("recv->decode", "decode->apply", "apply->enqueue", "enqueue->ack")
+
+    def __init__(self, enabled: bool = True, window: int = 2048):
+        self.enabled = enabled
+        self.stages = LatencyStats(window)
+        self.fields = LatencyStats(window)
+
+    def frame_enqueued(self, trace: FrameTrace):
+        self.stages.record("recv->decode", trace.t_decode - trace.t_recv)
+        self.stages.record("decode->apply", trace.t_apply - trace.t_decode)
+        self.stages.record("apply->enqueue", trace.t_enqueue - trace.t_apply)
+
+    def field_acked(self, logical: str, queued: float, trace: FrameTrace):
+        now = time.monotonic()
+        self.stages.record("enqueue->ack", now - queued)
+        if trace is not None and logical:
+            self.fields.record(logical, now - trace.t_recv)
+
+    def dump(self) -> Dict[str, Any]:
+        return {
+            "budget_ms": CONFIG["latency_budget_ms"],
+            "stages": self.stages.summary(),
+            "fields": self.fields.summary(),
+        }
+
+    def format_summary(self) -> str:
+        data = self.dump()
+        budget = data["budget_ms"]
+        lines = []
+        for title, table in (("steg", data["stages"]), ("felt", data["fields"])):
+            for key, st in table.items():
+                flag = "  > BUDSJETT" if st["p99_ms"] > budget else ""
+                lines.append(
+                    f"  {title:<4} {key:<15} n={st['n']:<5} p50={st['p50_ms']:6.1f}  "
+                    f"p95={st['p95_ms']:6.1f}  p99={st['p99_ms']:6.1f} ms{flag}"
+                )
+        return "\n".join(lines)
+
+    def write_dump(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.dump(), f, indent=2)
+        os.replace(tmp, path)
+
+
+LATENCY = LatencyTracer(enabled=CONFIG["latency_tracing"])
+
+# ==========================================================
+#  METRIKKER (tellere og histogrammer)
+# ==========================================================
+
+# Histogramgrenser i sekunder
+REQUEST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LOCK_BUCKETS = (0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05)
+
+
+class Histogram:
+    """
+    Histogram med faste grenser (Prometheus "le"). observe() er ett bisect
+    og to inkrementer, uten lås; leses kun av metrikk-endepunktet.
+    """
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)   # siste = +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class TimedLock:
+    """
+    threading.Lock som måler ventetid (før acquire lykkes) og holdetid.
+    Begge observeres mens låsen holdes, så histogrammene trenger ingen
+    egen lås.
+    """
+
+    __slots__ = ("_lock", "_acquired_at", "wait", "hold")
+
+    def __init__(self, wait: Histogram, hold: Histogram):
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+        self.wait = wait
+        self.hold = hold
+
+    def __enter__(self):
+        t0 = time.monotonic()
+        self._lock.acquire()
+        now = time.monotonic()
+        self._acquired_at = now
+        self.wait.observe(now - t0)
+        return self
+
+    def __exit__(self, *exc):
+        self.hold.observe(time.monotonic() - self._acquired_at)
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+
+class CourtMetrics:
+    """
+    Tellere for én bane. Skrives uten lås fra lyttetråden/event-loopen
+    (én skriver per teller) og leses av metrikk-endepunktet.
+    """
+
+    INVALID_NID = 100   # plass i frames for nyttelast uten gyldig nid
+
+    def __init__(self):
+        self.frames = [0] * (self.INVALID_NID + 1)
+        self.bytes_received = 0
+        self.connections = 0
+        self.framing_errors = 0      # fra lukkede tilkoblinger
+        self._framers = set()        # åpne tilkoblinger
+        self.lock_wait = Histogram(LOCK_BUCKETS)
+        self.lock_hold = Histogram(LOCK_BUCKETS)
+
+    def connection_opened(self, framer: "BodetFramer"):
+        self.connections += 1
+        self._framers.add(framer)
+
+    def connection_closed(self, framer: "BodetFramer"):
+        self._framers.discard(framer)
+        self.framing_errors += framer.frames_bad
+
+    def framing_errors_total(self) -> int:
+        return self.framing_errors + sum(f.frames_bad for f in list(self._framers))
+
+# ==========================================================
+#  BRO MELLOM TRÅDER OG ASYNCIO-KJERNEN
+# ==========================================================
+
+class LoopSignal:
+    """asyncio.Event som kan settes trygt fra hvilken som helst tråd."""
+
+    def __init__(self, loop: "asyncio.AbstractEventLoop"):
+        import asyncio
+        self.loop = loop
+        self.event = asyncio.Event()
+        self._loop_thread = threading.get_ident()
+
+    def set(self):
+        if threading.get_ident() == self._loop_thread:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.event.set)
+
+
+class CoreBridge:
+    """
+    Lar GUI-tråden kalle inn i kjernen. Med trådkjernen kjøres kallet
+    direkte; med asyncio-kjernen legges det på event-loopen.
+    """
+
+    def __init__(self):
+        self.loop = None
+
+    def call(self, fn: Callable, *args):
+        if self.loop is None:
+            fn(*args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
+
+
+CORE_BRIDGE = CoreBridge()
+
+# ==========================================================
+#  VMIX-SENDER (bakgrunnstråd, "siste verdi vinner")
+# ==========================================================
+
+# Prioritetsklasser, høyeste først; felt uten klasse havner i siste
+PRIORITY_CLASSES = ("score", "clock", "other")
+
+class VmixSender:
+    """
+    Sender kommandoer til én vMix-maskin fra en egen tråd.
+
+    Produsentene (parser, ticker, GUI) legger bare verdien i et slot per
+    (Input, Function, SelectedName) og returnerer med en gang – de venter aldri
+    på HTTP. Endres et felt flere ganger før senderen rekker å sende,
+    sendes kun siste verdi; mellomverdier (f.eks. utdaterte klokketikk)
+    droppes i stedet for å bli liggende i kø.
+
+    Alt som ligger klart når senderen våkner sendes som én flush: med
+    workers > 1 parallelt over transportens forbindelser, ellers i
+    rekkefølge (TCP-transporten pipeliner uansett). Felter fra samme
+    Bodet-frame havner derfor på lufta samtidig.
+
+    Strupning: et felt sendes ikke oftere enn field_rates[felt] per
+    sekund, og maskinen får ikke mer enn rps_budget kommandoer per sekund
+    (token bucket, ett sekunds burst). Det som holdes igjen blir liggende
+    i slotet og slås sammen med nyere verdier. Felter i bypass (score,
+    fouls) strupes aldri.
+
+    Prioritet: hver runde sender kun den høyeste klassen (PRIORITY_CLASSES)
+    som har noe klart, og ser så etter nytt. Lavere klasser sendes maks
+    én runde med parallelle kall om gangen, så en score som kommer mens
+    klokker og navn venter aldri står bak mer enn det. Kø-tid (i kø -> sendes)
+    måles per klasse i queue_delay.
+
+    Senderen husker hva maskinen har kvittert for (cache) og hva som er
+    underveis, og sender ikke samme verdi to ganger. En verdi regnes som
+    vist først når vMix kvitterer; verdier som feiler, avvises eller
+    forsvinner med forbindelsen glemmes. En enkelt transportfeil legger
+    feltet i kø igjen (med mindre en nyere verdi alt ligger der). Først
+    etter down_after feil på rad (uten kvittering imellom; en forbindelse
+    som faller med kommandoer underveis er én feil) regnes maskinen som
+    nede: da
+    prøves kun én kommando per retry_interval, og når den svarer igjen
+    sendes kun feltene der cachen avviker fra ønsket tilstand (desired,
+    satt av VmixFanout).
+    """
+
+    def __init__(self, transport, name: str = "vmix", primary: bool = True,
+                 retry_interval: float = 2.0,
+                 field_rates: Dict[str, float] = None,
+                 rps_budget: float = 0.0,
+                 bypass=(),
+                 priorities: Dict[str, str] = None,
+                 down_after: int = 3):
+        self.transport = transport
+        self.name = name
+        self.primary = primary          # kun primær måler latens
+        self.retry_interval = retry_interval
+        self.down_after = max(1, down_after)
+        self._failures_in_row = 0
+
+        self.field_rates = dict(field_rates or {})
+        self.rps_budget = rps_budget
+        self.bypass = frozenset(bypass)
+        self.priorities = dict(priorities or {})
+        # logisk felt -> (intervall, bypass, prioritet som indeks i PRIORITY_CLASSES)
+        self._policies: Dict[str, Tuple[float, bool, int]] = {}
+        self._next_allowed: Dict[Tuple[str, str, str], float] = {}
+        self._tokens = float(rps_budget)
+        self._tokens_at = time.monotonic()
+        self._held: Dict[Tuple[str, str, str], Any] = {}   # holdt igjen i forrige runde
+        self.desired: Callable[[], Dict[Tuple[str, str, str], Tuple[str, str]]] = None
+
+        # (Input, Function, SelectedName) -> (verdi, tidspunkt i kø, logisk felt, FrameTrace)
+        self._slots: Dict[Tuple[str, str, str], Tuple[str, float, str, Any]] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._signal = None      # LoopSignal når senderen går som asyncio-task
+        self._workers = getattr(transport, "max_parallel", 1)
+        self._pool = None        # ThreadPoolExecutor, lages ved første flush (workers > 1)
+        self._pool_workers = 0
+        self._new_transport = None   # byttes av sender-løkka mellom to flusher
+
+        # (Input, Function, SelectedName) -> verdi maskinen har kvittert for
+        self._cache: Dict[Tuple[str, str, str], str] = {}
+        # ... og verdi sendt, men ikke kvittert ennå (TCP). Flyttes til
+        # _cache i on_ack; avvist/mistet/utløpt fjernes via on_lost.
+        self._inflight: Dict[Tuple[str, str, str], str] = {}
+        self._attach(transport)
+
+        self.healthy = True
+        self.down_since = 0.0
+        self._next_probe = 0.0
+
+        # Enkle tellere for debug_printer
+        self.sent = 0
+        self.coalesced = 0       # verdi erstattet av nyere før den ble sendt
+        self.throttled = 0       # holdt igjen av feltets maks rate
+        self.over_budget = 0     # holdt igjen av rps_budget
+        self.flushes = 0
+        self.skipped = 0         # ikke sendt fordi maskinen var nede
+        self.caught_up = 0       # felter sendt på nytt etter nedetid
+        self.outages = 0
+        self.reconciled = 0      # felter avstemmingen fant feil i vMix
+        self.requests = 0        # kommandoer gitt til transporten
+        self.rejected = 0        # avvist av vMix (HTTP-feilstatus)
+        self.failed = 0          # transportfeil (timeout, brudd)
+        self.request_latency = Histogram(REQUEST_BUCKETS)   # send -> kvittering
+        # Fra frame lagt i kø til siste felt i framen er sendt (sekunder)
+        self.last_frame_latency = 0.0
+        self.worst_frame_latency = 0.0
+        self.queue_delay = LatencyStats(window=1024)   # per prioritetsklasse
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def submit_many(self, items, trace: FrameTrace = None) -> float:
+        """
+        items: [(input, function, selected_name, value, logisk felt), ...]
+        fra én frame. Returnerer tidspunktet de ble lagt i kø.
+        """
+        now = time.monotonic()
+        with self._cond:
+            for input_name, function, selected_name, value, logical in items:
+                key = (input_name, function, selected_name)
+                if key in self._slots:
+                    self.coalesced += 1
+                self._slots[key] = (value, now, logical, trace)
+            self._cond.notify()
+        if self._signal is not None:
+            self._signal.set()
+        return now
+
+    def submit(self, input_name: str, function: str, selected_name: str, value: str,
+               logical: str = ""):
+        self.submit_many([(input_name, function, selected_name, value, logical)])
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._slots)
+
+    def _send_one(self, item) -> float:
+        key, (value, queued, logical, trace) = item
+        now = time.monotonic()
+        if self._cache.get(key) == value or self._inflight.get(key) == value:
+            return now
+        if not self.healthy:
+            if now < self._next_probe:
+                self.skipped += 1
+                return now
+            self._next_probe = now + self.retry_interval
+
+        input_name, function, selected_name = key
+        track = self.primary and LATENCY.enabled
+        latency = self.request_latency
+        t_send = time.monotonic()
+
+        def on_ack():
+            latency.observe(time.monotonic() - t_send)
+            if track:
+                LATENCY.field_acked(logical, queued, trace)
+            # Først nå vises verdien; en nyere verdi kan fortsatt være underveis
+            self._cache[key] = value
+            if self._inflight.get(key) == value:
+                self._inflight.pop(key, None)
+            self._acked()
+
+        # Kjøres kun fra sender-tråden, aldri under en banes lås. Markeres
+        # underveis før sending, så en avvisning (on_lost) ikke kan komme først.
+        self._inflight[key] = value
+        self.requests += 1
+        try:
+            self.transport.send(function, input_name, selected_name, value, on_ack)
+        except VmixCommandError as e:
+            # vMix svarte, men avviste kommandoen: maskinen er oppe og
+            # viser fortsatt forrige kvitterte verdi
+            self._inflight.pop(key, None)
+            self.rejected += 1
+            log_vmix.error("[vMix %s] ERROR %s %s/%s: %s", self.name, function,
+                           input_name, selected_name, e)
+        except Exception as e:
+            # Ukjent om vMix fikk den: ingen verdi regnes som vist
+            self._inflight.pop(key, None)
+            self._cache.pop(key, None)
+            with self._cond:
+                self.failed += 1
+                self._failures_in_row += 1
+                down = not self.healthy or self._failures_in_row >= self.down_after
+                if not down and key not in self._slots:
+                    # Prøv feltet igjen neste runde, som om det var nytt
+                    self._slots[key] = (value, queued, logical, trace)
+            if down:
+                self._mark_down(e)
+            else:
+                log_vmix.debug("[vMix %s] Feil %d på rad, prøver %s igjen: %s", self.name,
+                               self._failures_in_row, selected_name, e)
+        return time.monotonic()
+
+    def _acked(self):
+        """Maskinen kvitterte (HTTP: i send, TCP: fra lesetråden)."""
+        with self._cond:
+            self._failures_in_row = 0
+        if not self.healthy:
+            self._mark_up()
+
+    def reconfigure(self, transport=None, retry_interval: float = None,
+                    field_rates: Dict[str, float] = None, rps_budget: float = None,
+                    bypass=None, priorities: Dict[str, str] = None,
+                    down_after: int = None):
+        """
+        Ny strupning/prioritet (gjelder fra neste runde) og eventuelt ny
+        transport (ny vMix-adresse). Transporten byttes av sender-løkka
+        mellom to flusher, så ingen kall er underveis på den gamle.
+        """
+        with self._cond:
+            if retry_interval is not None:
+                self.retry_interval = retry_interval
+            if field_rates is not None:
+                self.field_rates = dict(field_rates)
+            if rps_budget is not None:
+                self.rps_budget = rps_budget
+                self._tokens = min(self._tokens, float(rps_budget))
+            if bypass is not None:
+                self.bypass = frozenset(bypass)
+            if priorities is not None:
+                self.priorities = dict(priorities)
+            if down_after is not None:
+                self.down_after = max(1, down_after)
+            # Policy-cachen er avledet av verdiene over
+            self._policies = {}
+            if transport is not None:
+                self._new_transport = transport
+            self._cond.notify()
+        if self._signal is not None:
+            self._signal.set()
+
+    def _swap_transport(self):
+        """
+        Fra sender-løkka: ta i bruk ny transport. Den nye maskinen har
+        ingenting av det vi har sendt, så cachen tømmes og alt i ønsket
+        tilstand legges i kø på nytt (kun for denne maskinen).
+        """
+        with self._cond:
+            new, self._new_transport = self._new_transport, None
+        if new is None:
+            return
+        old = self.transport
+        self._detach(old)
+        self.transport = new
+        self._workers = getattr(new, "max_parallel", 1)
+        self._attach(new)
+        self._cache.clear()
+        self._inflight.clear()
+        self.healthy = True
+        self._next_probe = 0.0
+        try:
+            old.close()
+        except Exception as e:
+            log_vmix.debug("[vMix %s] Lukking av gammel transport: %s", self.name, e)
+        log_vmix.info("[vMix %s] Ny transport, sender %d felt på nytt",
+                      self.name, self._catch_up())
+
+    def _attach(self, transport):
+        if hasattr(transport, "on_lost"):
+            transport.on_lost = self._forget
+        if hasattr(transport, "on_dropped"):
+            transport.on_dropped = self._on_dropped
+
+    def _detach(self, transport):
+        if hasattr(transport, "on_lost"):
+            transport.on_lost = None
+        if hasattr(transport, "on_dropped"):
+            transport.on_dropped = None
+
+    def _forget(self, function: str, input_name: str, selected_name: str):
+        """Transporten mistet eller fikk avvist en kommando (fra lesetråden)."""
+        key = (input_name, function, selected_name)
+        self._inflight.pop(key, None)
+        self._cache.pop(key, None)
+
+    def _on_dropped(self):
+        """
+        Forbindelsen falt med kommandoer underveis (allerede glemt via
+        on_lost). Teller som én feil på rad; ellers legges de i kø igjen
+        fra ønsket tilstand, så de går ut på neste forbindelse i stedet
+        for å vente på avstemmingen.
+        """
+        with self._cond:
+            self.failed += 1
+            self._failures_in_row += 1
+            down = self._failures_in_row >= self.down_after
+        if down or not self.healthy:
+            self._mark_down(ConnectionError("kommandoer forsvant med forbindelsen"))
+            return
+        missed = self._catch_up()
+        if missed:
+            self.caught_up += missed
+            log_vmix.info("[vMix %s] %d felt mistet med forbindelsen, sender på nytt",
+                          self.name, missed)
+
+    def _mark_down(self, error: Exception):
+        self._next_probe = time.monotonic() + self.retry_interval
+        if not self.healthy:
+            log_vmix.debug("[vMix %s] Fortsatt nede: %s", self.name, error)
+            return
+        self.healthy = False
+        self.down_since = time.monotonic()
+        self.outages += 1
+        log_vmix.warning("[vMix %s] Nede: %s – prøver igjen hvert %.1f s",
+                         self.name, error, self.retry_interval)
+
+    def _mark_up(self):
+        with self._cond:
+            if self.healthy:
+                return
+            self.healthy = True
+        log_vmix.info("[vMix %s] Tilbake etter %.1f s, sender manglende felter",
+                      self.name, time.monotonic() - self.down_since)
+        self.caught_up += self._catch_up()
+
+    def reconcile(self) -> int:
+        """
+        Henter vMix sin faktiske tilstand (XML) og sender på nytt kun
+        feltene som avviker fra ønsket tilstand. Felter som endres eller
+        er underveis mens XML-en hentes hoppes over; de tas av vanlig
+        sending. Returnerer antall felter som ble sendt på nytt.
+        """
+        if self.desired is None or not self.healthy:
+            return 0
+        before = self.desired()
+        if not before:
+            return 0
+        try:
+            xml = self.transport.fetch_xml()
+        except Exception as e:
+            log_vmix.warning("[vMix %s] Avstemming: kunne ikke hente XML: %s", self.name, e)
+            return 0
+        actual = parse_vmix_xml(xml, {input_name for input_name, _f, _s in before})
+        after = self.desired()
+
+        wrong = []
+        for key, (value, logical) in before.items():
+            if after.get(key) != (value, logical) or self._cache.get(key) != value:
+                continue
+            shown = actual.get(key)
+            # Mangler i XML: feil input/felt, ikke noe å rette ved å sende
+            if shown is not None and shown != value:
+                self._cache.pop(key, None)
+                wrong.append((*key, value, logical))
+
+        if wrong:
+            self.reconciled += len(wrong)
+            log_vmix.warning("[vMix %s] Avstemming: %d felt avvek, sender på nytt: %s",
+                             self.name, len(wrong), ", ".join(item[2] for item in wrong))
+            self.submit_many(wrong)
+        return len(wrong)
+
+    def _catch_up(self) -> int:
+        """Legg i kø feltene der maskinen ikke har ønsket verdi; returnerer antall."""
+        if self.desired is None:
+            return 0
+        missed = [
+            (input_name, function, selected_name, value, logical)
+            for (input_name, function, selected_name), (value, logical) in self.desired().items()
+            if self._cache.get((input_name, function, selected_name)) != value
+        ]
+        if missed:
+            self.submit_many(missed)
+        return len(missed)
+
+    def _policy(self, logical: str) -> Tuple[float, bool, int]:
+        policy = self._policies.get(logical)
+        if policy is None:
+            # "Bane 2/game_clock" -> "game_clock"
+            field = logical.rpartition("/")[2]
+            rate = self.field_rates.get(field, 0)
+            klass = self.priorities.get(field, PRIORITY_CLASSES[-1])
+            priority = (PRIORITY_CLASSES.index(klass) if klass in PRIORITY_CLASSES
+                        else len(PRIORITY_CLASSES) - 1)
+            policy = (1.0 / rate if rate > 0 else 0.0, field in self.bypass, priority)
+            self._policies[logical] = policy
+        return policy
+
+    def _next_batch(self):
+        """
+        Kalles med _cond holdt. Tar ut det som kan sendes nå i den høyeste
+        prioritetsklassen som har noe klart; lavere klasser og strupede
+        felter blir liggende. Returnerer (batch, sekunder til neste
+        forsøk eller None).
+        """
+        now = time.monotonic()
+        batch = []
+        wake = None
+        if self._slots:
+            budget = self.rps_budget
+            if budget > 0:
+                self._tokens = min(budget, self._tokens + (now - self._tokens_at) * budget)
+                self._tokens_at = now
+            held = {}
+            was_held = self._held
+
+            # 1) Felt-rate: hva kan sendes nå, og beste klasse blant dem
+            ready = []
+            best = len(PRIORITY_CLASSES)
+            for key, item in self._slots.items():
+                interval, bypass, priority = self._policy(item[2])
+                if not bypass and interval:
+                    allowed = self._next_allowed.get(key, 0.0)
+                    if now < allowed:
+                        # Tell hver verdi én gang, ikke hver gang den sjekkes
+                        if was_held.get(key) is not item:
+                            self.throttled += 1
+                        held[key] = item
+                        wake = allowed if wake is None else min(wake, allowed)
+                        continue
+                ready.append((priority, key, item, interval, bypass))
+                if priority < best:
+                    best = priority
+
+            # 2) Budsjett og uttak, kun for beste klasse (øverste klasse helt,
+            #    lavere klasser maks én runde parallelle kall)
+            waiting = {}
+            klass = PRIORITY_CLASSES[min(best, len(PRIORITY_CLASSES) - 1)]
+            limit = len(ready) if best == 0 else self._workers
+            for priority, key, item, interval, bypass in ready:
+                if priority != best or len(batch) >= limit:
+                    waiting[key] = item
+                    continue
+                if not bypass:
+                    if budget > 0 and self._tokens < 1.0:
+                        if was_held.get(key) is not item:
+                            self.over_budget += 1
+                        held[key] = item
+                        refill = now + (1.0 - self._tokens) / budget
+                        wake = refill if wake is None else min(wake, refill)
+                        continue
+                    if interval:
+                        self._next_allowed[key] = now + interval
+                if budget > 0:
+                    # Bypass tar en token hvis det finnes, men venter aldri
+                    self._tokens = max(0.0, self._tokens - 1.0)
+                self.queue_delay.record(klass, now - item[1])
+                batch.append((key, item))
+
+            self._held = dict(held)
+            held.update(waiting)
+            self._slots = held
+
+        timeout = None if wake is None else max(0.0, wake - now)
+        if not self.healthy:
+            probe = max(0.0, self._next_probe - now)
+            timeout = probe if timeout is None else min(timeout, probe)
+        return batch, timeout
+
+    def _probe_due(self) -> bool:
+        return not self.healthy and not self._slots and time.monotonic() >= self._next_probe
+
+    def _probe(self):
+        # Nede og ingenting i kø: send det maskinen mangler som prøve
+        if not self._catch_up():
+            self._next_probe = time.monotonic() + self.retry_interval
+
+    def _run(self):
+        while True:
+            try:
+                self._step()
+            except Exception:
+                # Én feilet runde skal ikke stoppe all grafikk
+                log_vmix.exception("[vMix %s] Feil i sender-runden, fortsetter", self.name)
+                time.sleep(0.1)
+
+    def _step(self):
+        """Én runde i trådkjernen: bytt transport, send én batch eller vent."""
+        if self._new_transport is not None:
+            self._swap_transport()
+        with self._cond:
+            batch, timeout = self._next_batch()
+            probe = not batch and self._probe_due()
+            if not batch and not probe:
+                self._cond.wait(timeout)
+                return
+        if batch:
+            self._flush(batch)
+        else:
+            self._probe()
+
+    async def run_async(self):
+        """
+        Sender-løkka som asyncio-task. Venter på event-loopen; selve
+        flushen (blokkerende transport-I/O) kjøres i executor.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        self._signal = LoopSignal(loop)
+        while True:
+            self._signal.event.clear()
+            try:
+                if self._new_transport is not None:
+                    self._swap_transport()
+                with self._cond:
+                    batch, timeout = self._next_batch()
+                    probe = not batch and self._probe_due()
+                if batch:
+                    await loop.run_in_executor(None, self._flush, batch)
+                elif probe:
+                    self._probe()
+                else:
+                    try:
+                        await asyncio.wait_for(self._signal.event.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except Exception:
+                log_vmix.exception("[vMix %s] Feil i sender-runden, fortsetter", self.name)
+                await asyncio.sleep(0.1)
+
+    def _flush(self, batch):
+        workers = self._workers
+        if workers > 1 and len(batch) > 1:
+            if self._pool_workers != workers:
+                from concurrent.futures import ThreadPoolExecutor
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                self._pool = ThreadPoolExecutor(max_workers=workers)
+                self._pool_workers = workers
+            done = list(self._pool.map(self._send_one, batch))
+        else:
+            done = [self._send_one(item) for item in batch]
+
+        # Latens per frame = siste ferdige felt minus tidspunkt i kø
+        per_frame: Dict[float, float] = {}
+        for (_key, (_value, queued, _logical, _trace)), t_done in zip(batch, done):
+            per_frame[queued] = max(per_frame.get(queued, 0.0), t_done - queued)
+        worst = max(per_frame.values())
+
+        self.sent += len(batch)
+        self.flushes += 1
+        self.last_frame_latency = worst
+        if worst > self.worst_frame_latency:
+            self.worst_frame_latency = worst
+
+# ==========================================================
+#  VMIX-TRANSPORT (HTTP keep-alive)
+# ==========================================================
+
+class VmixCommandError(Exception):
+    """vMix svarte, men avviste kommandoen (maskinen er oppe)."""
+
+
+class VmixHttpTransport:
+    """
+    Persistent HTTP-transport mot vMix Web API.
+
+    Gjenbruker TCP-forbindelser via en requests.Session med egen pool,
+    i stedet for å åpne en ny forbindelse for hvert kall. URL-prefikset
+    per (Function, Input, SelectedName) bygges kun én gang. Sesjonen
+    (og requests) lastes først ved første kall.
+    """
+
+    def __init__(self, host: str, port: int,
+                 pool_size: int = 4,
+                 connect_timeout: float = 0.3,
+                 read_timeout: float = 0.3):
+        self.base_url = f"http://{host}:{port}/api/"
+        self.timeout = (connect_timeout, read_timeout)
+        # Blokkerende kall: senderen kan bruke én tråd per forbindelse
+        self.max_parallel = pool_size
+
+        self._pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+        self._prefixes: Dict[Tuple[str, str, str], str] = {}
+
+    @property
+    def session(self):
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size,
+                                          max_retries=0)
+                    session.mount("http://", adapter)
+                    self._session = session
+                session = self._session
+        return session
+
+    def _prefix(self, function: str, input_name: str, selected_name: str) -> str:
+        key = (function, input_name, selected_name)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            prefix = (
+                f"{self.base_url}?Function={quote(function, safe='')}"
+                f"&Input={quote(input_name, safe='')}"
+                f"&SelectedName={quote(selected_name, safe='')}&Value="
+            )
+            self._prefixes[key] = prefix
+        return prefix
+
+    def send(self, function: str, input_name: str, selected_name: str, value: str,
+             on_ack: Callable[[], None] = None):
+        if function in VISIBILITY_FUNCTIONS:
+            function, value = function + value, ""
+        url = self._prefix(function, input_name, selected_name) + quote(value, safe="")
+        resp = self.session.get(url, timeout=self.timeout)
+        if resp.status_code >= 400:
+            raise VmixCommandError(f"HTTP {resp.status_code} {resp.reason}")
+        if on_ack is not None:
+            on_ack()
+
+    def fetch_xml(self) -> bytes:
+        """Hele vMix-tilstanden (GET /api/), for avstemming."""
+        resp = self.session.get(self.base_url,
+                                timeout=(self.timeout[0], max(self.timeout[1], 2.0)))
+        if resp.status_code >= 400:
+            raise VmixCommandError(f"HTTP {resp.status_code} {resp.reason}")
+        return resp.content
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+# ==========================================================
+#  VMIX-TRANSPORT (TCP API, port 8099)
+# ==========================================================
+
+class VmixTcpTransport:
+    """
+    Transport mot vMix sitt linjebaserte TCP API.
+
+    Holder én socket åpen og skriver "FUNCTION <navn> <query>\\r\\n" uten
+    å vente på svar (pipelining). Svarene ("FUNCTION OK ..." /
+    "FUNCTION ER ...") leses av en egen lesetråd og matches mot
+    utestående kommandoer i rekkefølge. Ved brudd kobles det opp på nytt
+    ved neste send; etter et mislykket forsøk tidligst etter
+    reconnect_delay sekunder. En vMix som henger (eller en halvåpen
+    forbindelse) oppdages ved at eldste utestående kommando ikke er
+    kvittert innen ack_timeout; da kobles forbindelsen ned som ved brudd.
+    sendall har samme timeout.
+
+    on_lost(function, input, selected_name) kalles for kommandoer som ble
+    avvist eller forsvant med forbindelsen; on_dropped() etterpå, én gang
+    per brudd der noe forsvant.
+    """
+
+    def __init__(self, host: str, port: int,
+                 connect_timeout: float = 0.3,
+                 reconnect_delay: float = 1.0,
+                 ack_timeout: float = 1.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.reconnect_delay = reconnect_delay
+        self.ack_timeout = ack_timeout
+        # Pipelinet: én sender-tråd holder
+        self.max_parallel = 1
+
+        self._sock = None
+        self._lock = threading.Lock()
+        self._connect_lock = threading.Lock()   # ett tilkoblingsforsøk om gangen
+        # (function, input, selected_name, on_ack, sendt) i sendt rekkefølge
+        self._pending = deque()
+        self._next_connect = 0.0
+        self.on_lost: Callable[[str, str, str], None] = None
+        self.on_dropped: Callable[[], None] = None
+        self._wlock = threading.Lock()   # sender-tråd og avstemming skriver på samme socket
+        self._xml_waiters = deque()      # [Event, XML-bytes] per utestående "XML"
+        self._prefixes: Dict[Tuple[str, str, str], bytes] = {}
+
+        self.ok = 0
+        self.errors = 0
+        self.lost = 0
+        self.reconnects = 0
+        self.timeouts = 0       # forbindelser koblet ned fordi vMix ikke svarte
+
+    def _prefix(self, function: str, input_name: str, selected_name: str) -> bytes:
+        key = (function, input_name, selected_name)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            prefix = (
+                f"FUNCTION {function} Input={quote(input_name, safe='')}"
+                f"&SelectedName={quote(selected_name, safe='')}&Value="
+            ).encode("ascii")
+            self._prefixes[key] = prefix
+        return prefix
+
+    def _connected(self):
+        """
+        Socketen, koblet opp ved behov. Sender-tråden og avstemmingen kan
+        komme samtidig: den andre venter på forsøket som pågår og bruker
+        forbindelsen derfra i stedet for å feile på reconnect-ventetiden.
+        """
+        with self._lock:
+            sock = self._sock
+        if sock is not None:
+            return sock
+        with self._connect_lock:
+            with self._lock:
+                sock = self._sock
+            if sock is None:
+                self._connect()
+                sock = self._sock
+        return sock
+
+    def _connect(self):
+        now = time.monotonic()
+        if now < self._next_connect:
+            raise ConnectionError("vMix TCP ikke tilkoblet (venter på reconnect)")
+        try:
+            sock = socket.create_connection((self.host, self.port),
+                                            timeout=self.connect_timeout)
+        except OSError:
+            # Bare mislykkede forsøk venter; et brudd kobles opp igjen straks
+            self._next_connect = time.monotonic() + self.reconnect_delay
+            raise
+        # Gjelder sendall, og vekker lesetråden så den kan sjekke fristen
+        sock.settimeout(self.ack_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self.reconnects += 1
+        log_vmix.info("[vMix TCP] Tilkoblet %s:%s", self.host, self.port)
+        threading.Thread(target=self._reader, args=(sock,), daemon=True).start()
+
+    def _drop(self, sock, reason: str):
+        with self._lock:
+            if self._sock is not sock:
+                return
+            self._sock = None
+            self.lost += len(self._pending)
+            lost = list(self._pending)
+            self._pending.clear()
+            waiters = list(self._xml_waiters)
+            self._xml_waiters.clear()
+        try:
+            sock.close()
+        except OSError:
+            pass
+        log_vmix.warning("[vMix TCP] Forbindelse brutt: %s", reason)
+        for waiter in waiters:
+            waiter[0].set()
+        if self.on_lost is not None:
+            for function, input_name, selected_name, _on_ack, _sent in lost:
+                self.on_lost(function, input_name, selected_name)
+        if lost and self.on_dropped is not None:
+            self.on_dropped()
+
+    def _overdue(self, now: float) -> bool:
+        """Eldste utestående kommando har ventet lenger enn ack_timeout."""
+        with self._lock:
+            return bool(self._pending) and now - self._pending[0][4] > self.ack_timeout
+
+    def _expire(self, sock):
+        self.timeouts += 1
+        self._drop(sock, f"ingen svar fra vMix på {self.ack_timeout:.1f} s")
+
+    def _reader(self, sock: socket.socket):
+        buf = b""
+        xml_len = None   # venter på XML-nyttelast av denne lengden
+        while True:
+            try:
+                data = sock.recv(4096)
+            except socket.timeout:
+                if self._overdue(time.monotonic()):
+                    self._expire(sock)
+                    return
+                continue
+            except OSError as e:
+                self._drop(sock, str(e))
+                return
+            if not data:
+                self._drop(sock, "lukket av vMix")
+                return
+
+            buf += data
+            while True:
+                if xml_len is not None:
+                    if len(buf) < xml_len:
+                        break
+                    self._on_xml(buf[:xml_len])
+                    buf = buf[xml_len:]
+                    xml_len = None
+                    continue
+                nl = buf.find(b"\n")
+                if nl == -1:
+                    break
+                line = buf[:nl].rstrip(b"\r")
+                buf = buf[nl + 1:]
+                if line.startswith(b"FUNCTION "):
+                    self._on_reply(line)
+                elif line.startswith(b"XML "):
+                    try:
+                        xml_len = int(line[4:])
+                    except ValueError:
+                        log_vmix.warning("[vMix TCP] Ugyldig XML-svar: %r", line)
+
+    def _on_xml(self, xml: bytes):
+        with self._lock:
+            waiter = self._xml_waiters.popleft() if self._xml_waiters else None
+        if waiter is not None:
+            waiter[1] = xml
+            waiter[0].set()
+
+    def _on_reply(self, line: bytes):
+        with self._lock:
+            cmd = self._pending.popleft() if self._pending else None
+        if line.startswith(b"FUNCTION OK"):
+            self.ok += 1
+            if cmd is not None and cmd[3] is not None:
+                cmd[3]()
+        else:
+            self.errors += 1
+            what = f"{cmd[0]} {cmd[1]}/{cmd[2]}" if cmd else "?"
+            log_vmix.error("[vMix TCP] ERROR %s: %s", what, line.decode(errors="replace"))
+            if cmd is not None and self.on_lost is not None:
+                self.on_lost(cmd[0], cmd[1], cmd[2])
+
+    def send(self, function: str, input_name: str, selected_name: str, value: str,
+             on_ack: Callable[[], None] = None):
+        if function in VISIBILITY_FUNCTIONS:
+            function, value = function + value, ""
+        line = (self._prefix(function, input_name, selected_name)
+                + quote(value, safe="").encode("ascii") + b"\r\n")
+        sock = self._connected()
+        now = time.monotonic()
+        if self._overdue(now):
+            self._expire(sock)
+            raise ConnectionError("vMix TCP svarer ikke")
+
+        with self._lock:
+            self._pending.append((function, input_name, selected_name, on_ack, now))
+        try:
+            with self._wlock:
+                sock.sendall(line)
+        except OSError as e:
+            self._drop(sock, str(e))
+            raise
+
+    def fetch_xml(self, timeout: float = 2.0) -> bytes:
+        """Hele vMix-tilstanden ("XML"-kommandoen), for avstemming."""
+        sock = self._connected()
+
+        waiter = [threading.Event(), None]
+        with self._lock:
+            self._xml_waiters.append(waiter)
+        try:
+            with self._wlock:
+                sock.sendall(b"XML\r\n")
+        except OSError as e:
+            self._drop(sock, str(e))
+            raise
+        if not waiter[0].wait(timeout):
+            # Svaret ville kommet ut av takt med ventelisten: koble ned
+            self._drop(sock, "ingen XML fra vMix")
+            raise TimeoutError("ingen XML fra vMix")
+        if waiter[1] is None:
+            raise TimeoutError("ingen XML fra vMix")
+        return waiter[1]
+
+    def close(self):
+        with self._lock:
+            sock = self._sock
+        if sock is not None:
+            self._drop(sock, "lukket lokalt")
+
+
+def make_vmix_transport(cfg: Dict[str, Any]):
+    kind = cfg.get("vmix_transport", "http")
+    if kind == "tcp":
+        return VmixTcpTransport(
+            cfg["vmix_host"],
+            cfg["vmix_tcp_port"],
+            connect_timeout=cfg["vmix_connect_timeout"],
+            ack_timeout=cfg["vmix_tcp_ack_timeout"],
+        )
+    if kind != "http":
+        log_vmix.warning("[vMix] Ukjent vmix_transport '%s', bruker http", kind)
+    return VmixHttpTransport(
+        cfg["vmix_host"],
+        cfg["vmix_port"],
+        pool_size=cfg["vmix_http_pool_size"],
+        connect_timeout=cfg["vmix_connect_timeout"],
+        read_timeout=cfg["vmix_read_timeout"],
+    )
+
+# ==========================================================
+#  VMIX-FANOUT (primær + backup)
+# ==========================================================
+
+class VmixFanout:
+    """
+    Sender de samme kommandoene til flere vMix-maskiner.
+
+    Hver maskin har sin egen VmixSender (tråd, transport, cache, helse),
+    så en backup som henger i timeout aldri forsinker primæren. Ønsket
+    tilstand per (Input, Function, SelectedName) huskes her, slik at en
+    maskin som kommer tilbake kan ta igjen kun det den gikk glipp av.
+    """
+
+    def __init__(self, senders):
+        self.senders = senders
+        self._desired: Dict[Tuple[str, str, str], Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        for sender in senders:
+            sender.desired = self.desired_snapshot
+
+    def desired_snapshot(self) -> Dict[Tuple[str, str, str], Tuple[str, str]]:
+        with self._lock:
+            return dict(self._desired)
+
+    def submit_many(self, items, trace: FrameTrace = None) -> float:
+        """Som VmixSender.submit_many; returnerer primærens kø-tidspunkt."""
+        with self._lock:
+            for input_name, function, selected_name, value, logical in items:
+                self._desired[(input_name, function, selected_name)] = (value, logical)
+        queued = [sender.submit_many(items, trace) for sender in self.senders]
+        return queued[0]
+
+    def submit(self, input_name: str, function: str, selected_name: str, value: str,
+               logical: str = ""):
+        self.submit_many([(input_name, function, selected_name, value, logical)])
+
+    def forget(self, keys):
+        """Elementer som ikke lenger er i noen layout: ikke ta igjen eller avstem dem."""
+        with self._lock:
+            for key in keys:
+                self._desired.pop(key, None)
+
+    def pending(self) -> int:
+        return sum(sender.pending() for sender in self.senders)
+
+    def start(self):
+        for sender in self.senders:
+            sender.start()
+
+    async def run_async(self):
+        import asyncio
+        await asyncio.gather(*(sender.run_async() for sender in self.senders))
+
+    def reconcile(self) -> int:
+        return sum(sender.reconcile() for sender in self.senders)
+
+
+def vmix_destination_configs(cfg: Dict[str, Any]):
+    """
+    [(navn, cfg), ...] per vMix-maskin: først cfg selv (primær), deretter
+    én per oppføring i cfg["vmix_destinations"], som arver øvrige vmix_*.
+    """
+    configs = [(cfg.get("vmix_name", "primary"), cfg)]
+    for i, extra in enumerate(cfg.get("vmix_destinations", []), start=2):
+        merged = dict(cfg)
+        merged.update(extra)
+        configs.append((extra.get("name", f"backup {i - 1}"), merged))
+    return configs
+
+
+def sender_policy(dest_cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """Strupning og prioritet for én maskin (VmixSender / reconfigure)."""
+    return {
+        "retry_interval": dest_cfg["vmix_retry_interval"],
+        "field_rates": dest_cfg["vmix_field_rate"],
+        "rps_budget": dest_cfg["vmix_rps_budget"],
+        "bypass": dest_cfg["vmix_throttle_bypass"],
+        "priorities": dest_cfg["vmix_priority"],
+        "down_after": dest_cfg["vmix_down_after"],
+    }
+
+
+def make_vmix_senders(cfg: Dict[str, Any]):
+    """Én VmixSender per vMix-maskin (se vmix_destination_configs)."""
+    return [
+        VmixSender(make_vmix_transport(dest_cfg), name=name, primary=(i == 0),
+                   **sender_policy(dest_cfg))
+        for i, (name, dest_cfg) in enumerate(vmix_destination_configs(cfg))
+    ]
+
+# ==========================================================
+#  VMIX-AVSTEMMING (XML)
+# ==========================================================
+
+VMIX_XML_FUNCTIONS = {"text": "SetText", "image": "SetImage"}
+
+
+def parse_vmix_xml(xml: bytes, inputs) -> Dict[Tuple[str, str, str], str]:
+    """
+    Plukker ut tekst- og bildefelt for de gitte inputene (nummer, key
+    eller tittel) fra vMix sin /api-XML, som
+    {(input, "SetText"/"SetImage", SelectedName): verdi}. Leser
+    strømmende, kaster andre inputer underveis og stopper etter </inputs>.
+    """
+    import xml.etree.ElementTree as ET
+    wanted = set(inputs)
+    out = {}
+    current = None
+    for event, elem in ET.iterparse(io.BytesIO(xml), events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == "input":
+                attrs = elem.attrib
+                current = next((v for v in (attrs.get("number"), attrs.get("key"),
+                                            attrs.get("title")) if v in wanted), None)
+            continue
+        if tag == "input":
+            current = None
+            elem.clear()
+        elif current is not None and tag in VMIX_XML_FUNCTIONS:
+            out[(current, VMIX_XML_FUNCTIONS[tag], elem.get("name", ""))] = elem.text or ""
+        elif tag == "inputs":
+            break
+    return out
+
+
+def vmix_reconciler():
+    interval = CONFIG["vmix_reconcile_interval"]
+    while True:
+        time.sleep(interval)
+        VMIX_FANOUT.reconcile()
+
+
+async def vmix_reconciler_async():
+    """Samme som vmix_reconciler, som asyncio-task (XML-henting i executor)."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    interval = CONFIG["vmix_reconcile_interval"]
+    while True:
+        await asyncio.sleep(interval)
+        await loop.run_in_executor(None, VMIX_FANOUT.reconcile)
+
+# ==========================================================
+#  SCOREBUG-LAYOUT (logiske felt -> vMix-elementer)
+# ==========================================================
+
+LAYOUT_FUNCTIONS = {
+    "text": "SetText",
+    "image": "SetImage",
+    "colour": "SetColor",
+}
+
+# Synlighet går internt som "Set...Visible" med verdi "On"/"Off", så av og
+# på deler slot og cache; transportene sender SetTextVisibleOn osv.
+VISIBILITY_FUNCTIONS = {"SetTextVisible", "SetImageVisible"}
+
+PERIOD_NAMES = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th"}
+
+
+def _layout_key(key):
+    # values fra JSON har strengnøkler; "3" skal treffe 3
+    if isinstance(key, str) and key.lstrip("-").isdigit():
+        return int(key)
+    return key
+
+
+class Binding:
+    """
+    Ett vMix-element bundet til ett logisk felt. Verdien slås opp i values
+    (ferdig beregnede vMix-verdier, f.eks. full bildesti per antall fouls),
+    ellers formateres den med fmt; fmt=None betyr "send ingenting".
+    Resultatet caches per verdi.
+    """
+
+    __slots__ = ("logical", "function", "selected_name", "values", "fmt", "_cache")
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, logical: str, kind: str, selected_name: str,
+                 values: Dict[Any, str] = None, fmt: str = "{}"):
+        if kind == "visible":
+            function = "SetImageVisible" if selected_name.endswith(".Source") else "SetTextVisible"
+        elif kind in LAYOUT_FUNCTIONS:
+            function = LAYOUT_FUNCTIONS[kind]
+        else:
+            raise ValueError(f"Ukjent layout-type '{kind}' for {selected_name}")
+        self.logical = logical
+        self.function = function
+        self.selected_name = selected_name
+        self.values = {_layout_key(k): v for k, v in (values or {}).items()}
+        self.fmt = fmt
+        self._cache: Dict[Any, str] = {}
+
+    def same_as(self, other: "Binding") -> bool:
+        """Samme element og samme verdier/format (cachen teller ikke)."""
+        return (self.function == other.function and
+                self.selected_name == other.selected_name and
+                self.values == other.values and self.fmt == other.fmt)
+
+    def render(self, value):
+        cache = self._cache
+        if value in cache:
+            return cache[value]
+        if value in self.values:
+            out = self.values[value]
+        elif self.function in VISIBILITY_FUNCTIONS:
+            out = "On" if value else "Off"
+        elif self.fmt is not None:
+            out = self.fmt.format(value)
+        else:
+            out = None
+        if len(cache) >= self.CACHE_SIZE:
+            cache.clear()
+        cache[value] = out
+        return out
+
+
+def _same_bindings(a: Tuple[Binding, ...], b: Tuple[Binding, ...]) -> bool:
+    return len(a) == len(b) and all(x.same_as(y) for x, y in zip(a, b))
+
+
+def build_layout(cfg: Dict[str, Any]) -> Dict[str, Tuple[Binding, ...]]:
+    """
+    Layout for én bane, gruppert per logisk felt: tekstfeltene i
+    cfg["fields"], fouls-bildene og ekstra bindinger i cfg["layout"].
+    Bildestier beregnes her, ikke per frame.
+    """
+    bindings = []
+    for logical, selected_name in cfg["fields"].items():
+        if selected_name:
+            if logical == "period":
+                bindings.append(Binding(logical, "text", selected_name, PERIOD_NAMES, "P{}"))
+            else:
+                bindings.append(Binding(logical, "text", selected_name))
+
+    base_path = cfg["fouls_base_path"]
+    for team, logical in (("A", "home_fouls"), ("B", "away_fouls")):
+        files = cfg["fouls_files"].get(team)
+        selected_name = cfg["fouls_fields"].get(team)
+        if not files or not selected_name:
+            log_fouls.warning("[FOULS] Ingen fouls-mapping for team '%s'", team)
+            continue
+        paths = {fouls: os.path.join(base_path, name) for fouls, name in files.items()}
+        bindings.append(Binding(logical, "image", selected_name, paths, fmt=None))
+
+    for extra in cfg.get("layout", []):
+        bindings.append(Binding(extra["field"], extra["kind"], extra["name"],
+                                extra.get("values"), extra.get("fmt", "{}")))
+
+    layout: Dict[str, list] = {}
+    for binding in bindings:
+        layout.setdefault(binding.logical, []).append(binding)
+    return {logical: tuple(group) for logical, group in layout.items()}
+
+
+# Logisk felt -> verdi fra ScoreState. Skrivere som vet hvilke felt de
+# endret (CHANGE_FIELDS, tickeren) leser kun disse; spillerfeltene kommer
+# i tillegg i state_fields.
+STATE_FIELDS: Dict[str, Callable[[ScoreState], Any]] = {
+    "home_name":       lambda s: s.home.name,
+    "away_name":       lambda s: s.away.name,
+    "home_score":      lambda s: s.home.score,
+    "away_score":      lambda s: s.away.score,
+    "period":          lambda s: s.period,
+    "game_clock":      lambda s: s.clock,
+    "shot_clock":      lambda s: s.shot_clock,
+    "clock_running":   lambda s: s.clock_running,
+    "shot_running":    lambda s: s.shot_running,
+    "home_fouls":      lambda s: max(0, min(5, s.home.fouls)),
+    "away_fouls":      lambda s: max(0, min(5, s.away.fouls)),
+    "home_timeouts":   lambda s: s.to_home,
+    "away_timeouts":   lambda s: s.to_away,
+    "possession":      lambda s: s.possession,
+    "home_possession": lambda s: s.possession == "home",
+    "away_possession": lambda s: s.possession == "away",
+}
+
+
+def state_fields(state: ScoreState) -> Dict[str, Any]:
+    """
+    Alle logiske felt (rå verdier) som layouten kan binde til, rett fra
+    Bodet-state. Lagnavn er Bodet sine; overrides legges på ved visning.
+    """
+    view = {logical: get(state) for logical, get in STATE_FIELDS.items()}
+
+    # Spillerstatistikk: home_player3_fouls, away_player12_points, ...
+    # (nummer = plass i Scorepad-lista, fra 1)
+    if not (state.home.player_fouls or state.home.player_points or
+            state.away.player_fouls or state.away.player_points):
+        return view
+    for prefix, team in (("home", state.home), ("away", state.away)):
+        for i, fouls in enumerate(team.player_fouls, 1):
+            view[f"{prefix}_player{i}_fouls"] = fouls
+        for i, points in enumerate(team.player_points, 1):
+            view[f"{prefix}_player{i}_points"] = points
+    return view
+
+
+def name_overrides(overrides: Overrides, home_name: str, away_name: str) -> Dict[str, str]:
+    """
+    Lagnavn som skal vises i stedet for Bodet sine ({} = ingen).
+
+    Bruker override-navn KUN hvis:
+      - force_team_names = True, OG
+      - minst ett av override-feltene faktisk har tekst.
+    """
+    home = overrides.home_name.strip()
+    away = overrides.away_name.strip()
+    if not (overrides.force_team_names and (home or away)):
+        return {}
+    return {"home_name": home or home_name, "away_name": away or away_name}
+
+
+def state_view(state: ScoreState, overrides: Overrides) -> Dict[str, Any]:
+    """Logiske felt med override-navn lagt på (Bodet-lagnavn som default)."""
+    view = state_fields(state)
+    view.update(name_overrides(overrides, view["home_name"], view["away_name"]))
+    return view
+
+# ==========================================================
+#  VMIX-KLIENT
+# ==========================================================
+
+class VmixClient:
+    """
+    Én vMix-input med layout (én per bane). All tekst, alle bilder,
+    farger og synlighet går gjennom samme diff (update_field), så bare
+    reelle endringer legges i den delte senderen. label settes foran
+    logiske feltnavn i latensmålingen når det er flere baner.
+    """
+
+    def __init__(self, input_name: str, layout: Dict[str, Tuple[Binding, ...]],
+                 sender: VmixFanout, overrides: Overrides, label: str = ""):
+        self.input = input_name
+        self.layout = layout
+        self.sender = sender
+        self.overrides = overrides
+        self.label = label
+        # Siste verdi lagt i kø per (Function, SelectedName) (kun for å slippe
+        # å legge samme verdi i kø igjen). Hva vMix faktisk har kvittert for
+        # holdes per maskin i VmixSender; feil rettes av catch-up og avstemming.
+        self._last_values: Dict[Tuple[str, str], str] = {}
+        self._tls = threading.local()
+        # Parser og ticker rendrer hvert sitt bilde utenfor banens lås;
+        # denne låsen gjør diff + innlegging i kø til ett steg, og eldre
+        # bilder enn det som er rendret hoppes over
+        self._render_lock = threading.Lock()
+        self._rendered_version = -1
+        # Override-navn ferdig strippet, gyldig så lenge _names_key er lik
+        self._names_key = None
+        self._names: Dict[str, str] = {}
+
+    @contextmanager
+    def batch(self, trace: FrameTrace = None):
+        """
+        Samler alle endringer i blokken til én transaksjon som legges i
+        kø samlet ved slutten. Kan nøstes; kun ytterste blokk sender.
+        Gjelder per tråd. Med trace stemples apply/enqueue.
+        """
+        tls = self._tls
+        depth = getattr(tls, "depth", 0)
+        if depth == 0:
+            tls.items = []
+        tls.depth = depth + 1
+        try:
+            yield
+        finally:
+            tls.depth = depth
+            if depth == 0:
+                items, tls.items = tls.items, []
+                if trace is not None:
+                    trace.t_apply = time.monotonic()
+                if items:
+                    queued = self.sender.submit_many(items, trace)
+                    if trace is not None:
+                        trace.t_enqueue = queued
+                        LATENCY.frame_enqueued(trace)
+
+    def _queue(self, function: str, selected_name: str, value: str, logical: str):
+        if self.label:
+            logical = self.label + logical
+        tls = self._tls
+        if getattr(tls, "depth", 0):
+            tls.items.append((self.input, function, selected_name, value, logical))
+        else:
+            self.sender.submit(self.input, function, selected_name, value, logical)
+
+    def update_field(self, logical: str, value):
+        """Diff for ett logisk felt: legg i kø elementene som faktisk endres."""
+        for binding in self.layout.get(logical, ()):
+            out = binding.render(value)
+            if out is None:
+                continue
+            key = (binding.function, binding.selected_name)
+            if self._last_values.get(key) != out:
+                log_vmix.debug("[vMix] %s -> %s %s = %s", logical, binding.function,
+                               binding.selected_name, out)
+                self._queue(binding.function, binding.selected_name, out, logical)
+                self._last_values[key] = out
+
+    def _name_overrides(self) -> bool:
+        """Oppdater cachede override-navn; True hvis de endret seg."""
+        ov = self.overrides
+        key = (ov.home_name, ov.away_name, ov.force_team_names)
+        if key == self._names_key:
+            return False
+        self._names_key = key
+        # Tom streng = Bodet-navnet, så dette gir samme navn som name_overrides
+        self._names = name_overrides(ov, "", "")
+        return True
+
+    def relayout(self, input_name: str, layout: Dict[str, Tuple[Binding, ...]],
+                 snap: StateSnapshot):
+        """
+        Bytter input og layout (ny konfigurasjon) i ett steg og sender kun
+        feltene der bindingene er endret. Elementer som er borte glemmes i
+        dedup og i ønsket tilstand; ny input betyr at alt må sendes dit.
+        Returnerer de logiske feltene som ble rendret på nytt.
+        """
+        with self._render_lock:
+            old_input, old = self.input, self.layout
+            old_keys = {(b.function, b.selected_name) for group in old.values() for b in group}
+            if input_name != old_input:
+                dirty = tuple(layout)
+                gone = old_keys
+                self._last_values.clear()
+            else:
+                dirty = tuple(logical for logical in {**old, **layout}
+                              if not _same_bindings(old.get(logical, ()),
+                                                    layout.get(logical, ())))
+                gone = old_keys - {(b.function, b.selected_name)
+                                   for group in layout.values() for b in group}
+                for key in gone:
+                    self._last_values.pop(key, None)
+            self.input = input_name
+            self.layout = layout
+            self.sender.forget([(old_input, function, selected_name)
+                                for function, selected_name in gone])
+
+            if self._name_overrides():
+                dirty = tuple(dict.fromkeys((*dirty, "home_name", "away_name")))
+            values = snap.values
+            names = self._names
+            with self.batch():
+                for logical in dirty:
+                    value = names.get(logical) or values.get(logical)
+                    if value is not None:
+                        self.update_field(logical, value)
+        return dirty
+
+    def update_from_snapshot(self, snap: StateSnapshot, trace: FrameTrace = None,
+                             force: bool = False):
+        """
+        Diff mot et publisert bilde. Trenger ikke banens lås. Kun feltene
+        som er endret siden forrige rendrede versjon formateres og
+        sammenlignes. Et bilde som er eldre enn det som allerede er
+        rendret hoppes over (det nyere har alt); force=True rendrer alle
+        felt i samme versjon på nytt.
+        """
+        with self._render_lock:
+            rendered = self._rendered_version
+            if snap.version < rendered or (snap.version == rendered and not force):
+                return
+            self._rendered_version = snap.version
+
+            if force or rendered < 0:
+                dirty = self.layout
+            elif snap.version == rendered + 1:
+                dirty = snap.changed
+            else:
+                dirty = snap.changed_since(rendered)
+            if self._name_overrides() and dirty is not self.layout:
+                dirty = (*dirty, "home_name", "away_name")
+
+            values = snap.values
+            names = self._names
+            # Ytterste batch her, så køen fylles før låsen slippes
+            with self.batch(trace):
+                for logical in dirty:
+                    value = names.get(logical) or values.get(logical)
+                    if value is not None:
+                        self.update_field(logical, value)
+
+
+# Én sender per vMix-maskin, delt av alle baner
+VMIX_FANOUT = VmixFanout(make_vmix_senders(CONFIG))
+
+# ==========================================================
+#  LAGFEIL-VISUAL (A_FAULS / B_FAULS med bilder)
+# ==========================================================
+
+def update_team_fouls_visual(team: str, fouls: int, court: "Court" = None):
+    """
+    Fouls-bildet for ett lag gjennom layouten (samme diff som resten).
+    Brukes ved oppstart; nid 31 går via update_from_snapshot.
+    """
+    court = court or DEFAULT_COURT
+    team_key = team.upper()
+    fouls = max(0, min(5, fouls))
+    logical = "home_fouls" if team_key == "A" else "away_fouls"
+
+    log_fouls.debug("[FOULS] %s%s fouls=%s", court.tag, team_key, fouls)
+    court.vmix.update_field(logical, fouls)
+
+# ==========================================================
+#  SCOREDEKODER
+# ==========================================================
+
+def decode_score(d1: int, d2: int, d3: int, prev: int) -> int:
+    """
+    Håndterer Bodet sine varianter:
+
+      - 0 0 4  -> 4   (enkeltsiffer)
+      - 0 4 0  -> 4   (før 10 poeng) eller 40 (etter 10)
+      - 0 1 7  -> 17  (tosifret)
+      - 0 6 5  -> 65  (tosifret)
+      - 1 0 3  -> 103 (tresifret)
+      - 1 1 4  -> 114 (tresifret)
+    """
+
+    # Alt null
+    if d1 == 0 and d2 == 0 and d3 == 0:
+        return 0
+
+    # 0 x 0: før 10 poeng enkeltsiffer, etter 10: tiere
+    if d1 == 0 and d3 == 0 and d2 > 0:
+        if prev is not None and prev >= 10:
+            return d2 * 10
+        else:
+            return d2
+
+    # 0 0 x: enkeltsiffer
+    if d1 == 0 and d2 == 0 and d3 > 0:
+        return d3
+
+    # 0 x y: tosifret
+    if d1 == 0:
+        return d2 * 10 + d3
+
+    # x y z: kan være tosifret (xy) eller tresifret (xyz)
+    candidate2 = d1 * 10 + d2
+    candidate3 = d1 * 100 + d2 * 10 + d3
+
+    # Hvis vi ikke har tidligere verdi, bruk heuristikk
+    if prev is None:
+        return candidate3
+
+    def is_small_step(new: int, old: int) -> bool:
+        diff = new - old
+        return 0 <= diff <= 3
+
+    # Hvis forrige score var >= 100, foretrekk alltid tresifret tolkning
+    if prev >= 100:
+        if is_small_step(candidate3, prev):
+            return candidate3
+        # Selv om ikke småsteg, bruk tresifret hvis vi allerede er over 100
+        return candidate3
+    
+    # Hvis forrige score var 90-99, kan vi gå over til 100+
+    if prev >= 90:
+        if is_small_step(candidate3, prev):
+            return candidate3
+        if is_small_step(candidate2, prev):
+            return candidate2
+        # Foretrekk tresifret hvis vi er nær 100
+        return candidate3 if candidate3 >= 100 else candidate2
+    
+    # Under 90: bruk tosifret tolkning
+    if is_small_step(candidate2, prev):
+        return candidate2
+    if is_small_step(candidate3, prev):
+        return candidate3
+    return candidate2 if abs(candidate2 - prev) < abs(candidate3 - prev) else candidate2
+
+# ==========================================================
+#  BODET-MELDINGER (endringsposter + dekodertabell)
+# ==========================================================
+
+# Endringsposter: det én melding sier, uten å røre state. Dekoderne er
+# rene funksjoner av nyttelasten; state endres kun i CHANGE_HANDLERS,
+# med banens lås holdt.
+
+class GameClockChange(NamedTuple):
+    seconds: float
+    running: bool
+    text: str
+
+
+class ShotClockChange(NamedTuple):
+    seconds: float
+    running: bool
+
+
+class PeriodChange(NamedTuple):
+    period: int
+
+
+class TimeoutsChange(NamedTuple):
+    home: int
+    away: int
+
+
+class ScoreChange(NamedTuple):
+    # Rå sifre (d1, d2, d3); tolkes med decode_score mot forrige score
+    home: Tuple[int, int, int]
+    away: Tuple[int, int, int]
+
+
+class TeamFoulsChange(NamedTuple):
+    home: int
+    away: int
+
+
+class TeamNameChange(NamedTuple):
+    team: str   # "home" / "away"
+    name: str
+
+
+class PlayerFoulsChange(NamedTuple):
+    team: str
+    fouls: Tuple[int, ...]
+
+
+class PlayerPointsChange(NamedTuple):
+    team: str
+    points: Tuple[int, ...]
+
+
+class PossessionChange(NamedTuple):
+    team: str   # "home" / "away" / ""
+
+
+@dataclass(frozen=True)
+class BodetField:
+    """
+    Ett felt i en Bodet-melding (indekser i nyttelasten, nid = 0..1):
+      num:    width ASCII-sifre -> int
+      digits: width ASCII-sifre -> tuple av sifre
+      run:    statusbyte, bit 1 invertert (0 = går) -> bool
+      text:   width bytes -> str (kortere melding gir kortere tekst)
+      list:   opptil count grupper à width sifre -> tuple av int
+    optional: mangler feltet blir verdien None i stedet for at meldingen
+    avvises (text og list er alltid valgfrie).
+    """
+    name: str
+    offset: int
+    width: int = 1
+    kind: str = "num"
+    count: int = 1
+    optional: bool = False
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.width * self.count
+
+
+# ASCII-byte -> siffer (som dig(), uten funksjonskall per byte)
+_DIGIT = tuple(dig(b) for b in range(256))
+
+
+def _field_reader(f: BodetField) -> Callable[[Any, int], Any]:
+    """Kompilerer et felt til en leser (msg, len(msg)) -> verdi."""
+    lo, width, end = f.offset, f.width, f.end
+    d = _DIGIT
+
+    if f.kind == "text":
+        def read(msg, n):
+            return bytes(msg[lo:lo + width]).decode(errors="ignore").strip()
+        return read
+
+    if f.kind == "list":
+        def read(msg, n):
+            out = []
+            for pos in range(lo, min(end, n) - width + 1, width):
+                value = 0
+                for b in msg[pos:pos + width]:
+                    value = value * 10 + d[b]
+                out.append(value)
+            return tuple(out)
+        return read
+
+    if f.kind == "run":
+        def read(msg, n):
+            return None if n <= lo else not bool(msg[lo] & 0x02)
+    elif f.kind == "digits":
+        def read(msg, n):
+            return None if n < end else tuple([d[b] for b in msg[lo:end]])
+    elif f.kind == "num":
+        if width == 1:
+            def read(msg, n):
+                return None if n <= lo else d[msg[lo]]
+        elif width == 2:
+            hi = lo + 1
+            def read(msg, n):
+                return None if n < end else d[msg[lo]] * 10 + d[msg[hi]]
+        else:
+            def read(msg, n):
+                if n < end:
+                    return None
+                value = 0
+                for b in msg[lo:end]:
+                    value = value * 10 + d[b]
+                return value
+    else:
+        raise ValueError(f"Ukjent felttype '{f.kind}' for {f.name}")
+    return read
+
+
+class BodetDecoder:
+    """
+    Én meldingstype: nid, feltlayout og build(*felt) -> endringsposter.
+    build får feltverdiene i layoutens rekkefølge. Meldinger kortere enn
+    de påkrevde feltene gir ingen poster.
+    """
+
+    __slots__ = ("nid", "name", "fields", "build", "min_len", "_readers")
+
+    def __init__(self, nid: int, name: str, fields: Tuple[BodetField, ...],
+                 build: Callable[..., tuple]):
+        self.nid = nid
+        self.name = name
+        self.fields = fields
+        self.build = build
+        self.min_len = max([2] + [f.end for f in fields
+                                  if not f.optional and f.kind not in ("text", "list")])
+        self._readers = tuple(_field_reader(f) for f in fields)
+
+    def decode(self, msg) -> tuple:
+        n = len(msg)
+        if n < self.min_len:
+            return ()
+        return self.build(*[read(msg, n) for read in self._readers])
+
+
+# nid -> dekoder (oppslag per frame)
+BODET_DECODERS: Dict[int, BodetDecoder] = {}
+
+
+def register_bodet_decoder(decoder: BodetDecoder) -> BodetDecoder:
+    """Legger til (eller erstatter) dekoderen for decoder.nid."""
+    BODET_DECODERS[decoder.nid] = decoder
+    return decoder
+
+
+def _build_game_clock(running, m, s, to_home, to_away, period, period_alt):
+    # 18 – hovedklokke, timeouts (hvis tilstede), periode (index 12, fallback 13)
+    clock = GameClockChange(float(m * 60 + s), running, f"{m:02d}:{s:02d}")
+    period = period or period_alt
+    if to_away is None:
+        return (clock, PeriodChange(period)) if period else (clock,)
+    timeouts = TimeoutsChange(to_home, to_away)
+    return (clock, timeouts, PeriodChange(period)) if period else (clock, timeouts)
+
+
+def _build_last_minute(running, s, t):
+    # 36 – siste minutt, tideler (0:ss.t)
+    return (GameClockChange(float(s) + t / 10.0, running, f"0:{s:02d}.{t}"),)
+
+
+def _build_team_name(team):
+    return lambda name: (TeamNameChange(team, name),)
+
+
+def _build_player_fouls(team):
+    return lambda fouls: (PlayerFoulsChange(team, fouls),) if fouls else ()
+
+
+def _build_player_points(team):
+    return lambda points: (PlayerPointsChange(team, points),) if points else ()
+
+
+POSSESSION_CODES = {1: "home", 2: "away"}
+
+# Feltlayoutene fra Bodet TV-protokollen. nid 18/30/31/36/50/98/99 er
+# det Scorepad sender i standardoppsettet; spillerstatistikk (32–35),
+# ballbesittelse (37) og timeouts (38) sendes kun når de er slått på i
+# Scorepad. Spillerlistene er i Scorepad-rekkefølge (maks 15 per lag).
+_RUN = BodetField("running", 2, kind="run")
+
+for _decoder in (
+    BodetDecoder(18, "hovedklokke", (
+        _RUN,
+        BodetField("minutes", 4, 2),
+        BodetField("seconds", 6, 2),
+        BodetField("to_home", 8, optional=True),
+        BodetField("to_away", 9, optional=True),
+        BodetField("period", 12, optional=True),
+        BodetField("period_alt", 13, optional=True),
+    ), _build_game_clock),
+    BodetDecoder(30, "score", (
+        BodetField("home", 3, 3, kind="digits"),
+        BodetField("away", 6, 3, kind="digits"),
+    ), lambda home, away: (ScoreChange(home, away),)),
+    BodetDecoder(31, "lagfeil", (
+        BodetField("home", 4),
+        BodetField("away", 6),
+    ), lambda home, away: (TeamFoulsChange(home, away),)),
+    BodetDecoder(32, "spillerfeil hjemme", (
+        BodetField("fouls", 3, 1, kind="list", count=15),
+    ), _build_player_fouls("home")),
+    BodetDecoder(33, "spillerfeil borte", (
+        BodetField("fouls", 3, 1, kind="list", count=15),
+    ), _build_player_fouls("away")),
+    BodetDecoder(34, "spillerpoeng hjemme", (
+        BodetField("points", 3, 2, kind="list", count=15),
+    ), _build_player_points("home")),
+    BodetDecoder(35, "spillerpoeng borte", (
+        BodetField("points", 3, 2, kind="list", count=15),
+    ), _build_player_points("away")),
+    BodetDecoder(36, "siste minutt", (
+        _RUN,
+        BodetField("seconds", 3, 2),
+        BodetField("tenths", 5),
+    ), _build_last_minute),
+    BodetDecoder(37, "ballbesittelse", (
+        BodetField("team", 3),
+    ), lambda team: (PossessionChange(POSSESSION_CODES.get(team, "")),)),
+    BodetDecoder(38, "timeouts", (
+        BodetField("home", 3),
+        BodetField("away", 4),
+    ), lambda home, away: (TimeoutsChange(home, away),)),
+    BodetDecoder(50, "shot clock", (
+        _RUN,
+        BodetField("seconds", 3, 2),
+    ), lambda running, seconds: (ShotClockChange(float(seconds), running),)),
+    BodetDecoder(98, "lagnavn hjemme", (
+        BodetField("name", 2, 18, kind="text"),
+    ), _build_team_name("home")),
+    BodetDecoder(99, "lagnavn borte", (
+        BodetField("name", 2, 18, kind="text"),
+    ), _build_team_name("away")),
+):
+    register_bodet_decoder(_decoder)
+del _decoder
+
+
+def decode_bodet_message(msg) -> tuple:
+    """
+    Nyttelast (bytes/memoryview) -> endringsposter. Ukjente og for korte
+    meldinger gir (). Rører ikke state og trenger ingen lås.
+    """
+    if len(msg) < 2:
+        return ()
+    decoder = BODET_DECODERS.get((msg[0] - 48) * 10 + (msg[1] - 48))
+    if decoder is None:
+        return ()
+    if log_bodet.isEnabledFor(logging.DEBUG):
+        log_bodet.debug("[BODET %02d] len= %d data= %s", decoder.nid, len(msg),
+                        " ".join(f"{b:02X}" for b in msg))
+    return decoder.decode(msg)
+
+# ==========================================================
+#  BODET-PARSER – HOVEDLOGIKK
+# ==========================================================
+
+def _team(state: ScoreState, team: str) -> TeamState:
+    return state.home if team == "home" else state.away
+
+
+def _apply_game_clock(ch: GameClockChange, court: "Court"):
+    sync_game_clock(ch.seconds, ch.running, ch.text, court)
+
+
+def _apply_shot_clock(ch: ShotClockChange, court: "Court"):
+    sync_shot_clock(ch.seconds, ch.running, court)
+
+
+def _apply_period(ch: PeriodChange, court: "Court"):
+    state = court.state
+    if ch.period != state.period:
+        state.home.period_fouls = 0
+        state.away.period_fouls = 0
+    state.period = ch.period
+
+
+def _apply_timeouts(ch: TimeoutsChange, court: "Court"):
+    court.state.to_home = ch.home
+    court.state.to_away = ch.away
+
+
+def _apply_score(ch: ScoreChange, court: "Court"):
+    state = court.state
+    last_sent = court.last_sent_score
+    for team, digits, label in (("home", ch.home, "HOME"), ("away", ch.away, "AWAY")):
+        score = decode_score(*digits, last_sent[team])
+        _team(state, team).score = score
+        if score != last_sent[team]:
+            diff = score - last_sent[team]
+            last_sent[team] = score
+            log_event.info("%s[EVENT] %s SCORE +%d -> %d", court.tag, label, diff, score)
+
+
+def _apply_team_fouls(ch: TeamFoulsChange, court: "Court"):
+    state = court.state
+    state.home.fouls = ch.home
+    state.away.fouls = ch.away
+    state.home.period_fouls = max(state.home.period_fouls, ch.home)
+    state.away.period_fouls = max(state.away.period_fouls, ch.away)
+    log_event.info("%s[EVENT] TEAM FOULS: H=%d A=%d", court.tag, ch.home, ch.away)
+
+
+def _apply_team_name(ch: TeamNameChange, court: "Court"):
+    _team(court.state, ch.team).name = ch.name
+
+
+def _apply_player_fouls(ch: PlayerFoulsChange, court: "Court"):
+    team = _team(court.state, ch.team)
+    if ch.fouls == team.player_fouls:
+        return
+    old = team.player_fouls
+    for i, fouls in enumerate(ch.fouls):
+        if i < len(old) and fouls != old[i]:
+            log_event.info("%s[EVENT] %s PLAYER %d FOULS -> %d", court.tag,
+                           ch.team.upper(), i + 1, fouls)
+    team.player_fouls = ch.fouls
+
+
+def _apply_player_points(ch: PlayerPointsChange, court: "Court"):
+    _team(court.state, ch.team).player_points = ch.points
+
+
+def _apply_possession(ch: PossessionChange, court: "Court"):
+    court.state.possession = ch.team
+
+
+# Posttype -> funksjon som fører posten inn i banens state
+CHANGE_HANDLERS: Dict[type, Callable[[Any, "Court"], None]] = {
+    GameClockChange: _apply_game_clock,
+    ShotClockChange: _apply_shot_clock,
+    PeriodChange: _apply_period,
+    TimeoutsChange: _apply_timeouts,
+    ScoreChange: _apply_score,
+    TeamFoulsChange: _apply_team_fouls,
+    TeamNameChange: _apply_team_name,
+    PlayerFoulsChange: _apply_player_fouls,
+    PlayerPointsChange: _apply_player_points,
+    PossessionChange: _apply_possession,
+}
+
+
+# Posttype -> logiske felt posten kan endre (None = sammenlign alle,
+# for spillerlister der feltnavnene avhenger av lengden)
+CHANGE_FIELDS: Dict[type, Tuple[str, ...]] = {
+    GameClockChange: ("game_clock", "clock_running"),
+    ShotClockChange: ("shot_clock", "shot_running"),
+    PeriodChange: ("period",),
+    TimeoutsChange: ("home_timeouts", "away_timeouts"),
+    ScoreChange: ("home_score", "away_score"),
+    TeamFoulsChange: ("home_fouls", "away_fouls"),
+    TeamNameChange: ("home_name", "away_name"),
+    PlayerFoulsChange: None,
+    PlayerPointsChange: None,
+    PossessionChange: ("possession", "home_possession", "away_possession"),
+}
+
+
+def apply_bodet_message(_msg_id: int, msg, trace: FrameTrace = None, court: "Court" = None):
+    """
+    msg: nyttelast som bytes eller memoryview (fra BodetFramer).
+    trace: tidsstempler for latensmåling (valgfri).
+    court: banen framen kom fra (standard: første bane).
+
+    Dekoding og vMix-diff skjer utenfor banens lås; under den føres
+    kun postene inn og et nytt bilde publiseres.
+    """
+    court = court or DEFAULT_COURT
+    if len(msg) >= 2:
+        nid = (msg[0] - 48) * 10 + (msg[1] - 48)
+        court.metrics.frames[nid if 0 <= nid < 100 else CourtMetrics.INVALID_NID] += 1
+
+    changes = decode_bodet_message(msg)
+    if trace is not None:
+        trace.t_decode = time.monotonic()
+    if not changes:
+        return
+
+    if len(changes) == 1:
+        fields = CHANGE_FIELDS[type(changes[0])]
+    else:
+        fields = ()
+        for change in changes:
+            touched = CHANGE_FIELDS[type(change)]
+            if touched is None:
+                fields = None
+                break
+            fields += touched
+
+    with court.lock:
+        for change in changes:
+            CHANGE_HANDLERS[type(change)](change, court)
+        snap = court.publish(fields)
+    # Én frame = én transaksjon mot vMix (tekst + bilder samlet), utenfor låsen
+    court.vmix.update_from_snapshot(snap, trace)
+
+# ==========================================================
+#  LOKAL NEDTELLING FOR KLOKKE / SHOTCLOCK
+# ==========================================================
+
+class ClockModel:
+    """
+    Faselåst lokal modell av en Bodet-nedtelling (kampklokke/shot clock).
+
+    Mellom Bodet-frames teller modellen ned på lokal monotonic tid med
+    estimert rate (Bodet-sekunder per lokalt sekund). En ny Bodet-verdi
+    overskriver ikke modellen når klokka går: fasefeilen svinges inn
+    over slew_time ved å justere raten midlertidig. Mens klokka går vises
+    aldri en høyere verdi enn det som allerede er vist.
+
+    Start, stopp og hopp nedover større enn snap_threshold setter
+    modellen hardt til Bodet-verdien. Oppover (Bodet viser mer tid enn
+    modellen, typisk en forsinket frame) settes den hardt bare ved hopp
+    større enn jump_threshold (operatør la til tid); ellers holdes visningen
+    til Bodet tar den igjen. Raten (drift) måles over minst drift_window
+    sekunder sammenhengende gange.
+    """
+
+    def __init__(self, name: str,
+                 snap_threshold: float = 0.5,
+                 slew_time: float = 1.0,
+                 jump_threshold: float = 3.0,
+                 drift_window: float = 30.0,
+                 max_drift: float = 0.02):
+        self.name = name
+        self.snap_threshold = snap_threshold
+        self.slew_time = slew_time
+        self.jump_threshold = jump_threshold
+        self.drift_window = drift_window
+        self.max_drift = max_drift
+
+        self.running = False
+        self.base = 0.0          # verdi ved anchor
+        self.anchor = 0.0        # lokal monotonic tid
+        self.rate = 1.0          # estimert Bodet-sek per lokalt sek
+        self.slew_rate = 1.0     # rate frem til slew_end
+        self.slew_end = 0.0
+        self._floor = None       # laveste viste verdi mens klokka går
+        self._ref = None         # (lokal tid, Bodet-verdi) for driftmåling
+
+        # Statistikk (sekunder); + = lokal modell viste mer tid enn Bodet
+        self.phase_error = 0.0   # glidende snitt
+        self.max_phase_error = 0.0
+        self.snaps = 0
+        self.slews = 0
+
+    @property
+    def drift_ppm(self) -> float:
+        return (self.rate - 1.0) * 1e6
+
+    def value(self, now: float) -> float:
+        if not self.running:
+            return self.base
+        dt = now - self.anchor
+        if dt <= 0:
+            return self.base
+        slew_dt = min(dt, max(0.0, self.slew_end - self.anchor))
+        v = self.base - self.slew_rate * slew_dt - self.rate * (dt - slew_dt)
+        return max(0.0, v)
+
+    def display(self, now: float) -> float:
+        """Verdien som skal vises: aldri høyere enn forrige visning mens klokka går."""
+        v = self.value(now)
+        if self.running:
+            if self._floor is not None and v > self._floor:
+                return self._floor
+            self._floor = v
+        return v
+
+    def seconds_until(self, target: float, now: float) -> float:
+        """Lokale sekunder til modellen når target."""
+        remaining = self.value(now) - target
+        if remaining <= 0 or not self.running:
+            return 0.0 if remaining <= 0 else math.inf
+        if now < self.slew_end:
+            # slew_rate 0 = holdt til slew_end, deretter vanlig rate
+            slew_span = (self.slew_end - now) * self.slew_rate
+            if self.slew_rate > 0 and remaining <= slew_span:
+                return remaining / self.slew_rate
+            return (self.slew_end - now) + (remaining - slew_span) / self.rate
+        return remaining / self.rate
+
+    def _snap(self, value: float, running: bool, now: float):
+        if running and not (self.running and self._ref is not None):
+            self._ref = (now, value)
+        elif not running:
+            self._ref = None
+        self.running = running
+        self.base = value
+        self.anchor = now
+        self.slew_end = 0.0
+        self.slew_rate = self.rate
+        self._floor = None
+
+    def observe(self, value: float, running: bool, now: float) -> bool:
+        """
+        Ny autoritativ verdi fra Bodet. Returnerer True hvis modellen ble
+        satt hardt til value, False hvis fasefeilen svinges inn.
+        """
+        if not (running and self.running):
+            self._snap(value, running, now)
+            return True
+
+        error = self.value(now) - value
+        # Nedover: hardt over snap_threshold. Oppover: bare ved reelle hopp,
+        # så visningsgulvet (_floor) beholdes for forsinkede frames.
+        if error > self.snap_threshold or -error > self.jump_threshold:
+            self.snaps += 1
+            self._ref = (now, value)
+            self._snap(value, running, now)
+            return True
+
+        self.slews += 1
+        self.phase_error += 0.1 * (error - self.phase_error)
+        self.max_phase_error = max(self.max_phase_error, abs(error))
+
+        # Drift: Bodet-tid / lokal tid over et langt, sammenhengende vindu
+        if self._ref is not None:
+            t_ref, v_ref = self._ref
+            span = now - t_ref
+            if span >= self.drift_window and v_ref > value:
+                measured = (v_ref - value) / span
+                lo, hi = 1.0 - self.max_drift, 1.0 + self.max_drift
+                self.rate = min(hi, max(lo, measured))
+
+        # Sving inn: fjern feilen over slew_time ved å justere raten
+        self.base = self.value(now)
+        self.anchor = now
+        self.slew_end = now + self.slew_time
+        self.slew_rate = max(0.0, self.rate + error / self.slew_time)
+        return False
+
+
+def sync_game_clock(value: float, running: bool, text: str, court: "Court" = None):
+    """Bodet-frame for kampklokka (nid 18/36). Kalles med banens lås holdt."""
+    court = court or DEFAULT_COURT
+    state = court.state
+    now = time.monotonic()
+    snapped = court.game_clock.observe(value, running, now)
+    shown = court.game_clock.display(now)
+    state.clock_seconds = shown
+    state.clock_running = running
+    # Ved hard synk vises Bodet-teksten som den er
+    state.clock = text if snapped else format_game_clock(shown)
+    CLOCK_WAKE.set()
+
+
+def sync_shot_clock(value: float, running: bool, court: "Court" = None):
+    """Bodet-frame for shot clock (nid 50). Kalles med banens lås holdt."""
+    court = court or DEFAULT_COURT
+    state = court.state
+    now = time.monotonic()
+    court.shot_clock.observe(value, running, now)
+    shown = court.shot_clock.display(now)
+    state.shot_seconds = shown
+    state.shot_running = running
+    state.shot_clock = format_shot_clock(shown)
+    CLOCK_WAKE.set()
+
+
+class ClockWake:
+    """
+    Vekker tickeren, enten den går som tråd (threading.Event) eller som
+    asyncio-task (LoopSignal etter attach_loop).
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._signal = None
+
+    def attach_loop(self, loop: "asyncio.AbstractEventLoop"):
+        self._signal = LoopSignal(loop)
+
+    def set(self):
+        self._event.set()
+        if self._signal is not None:
+            self._signal.set()
+
+    def clear(self):
+        self._event.clear()
+        if self._signal is not None:
+            self._signal.event.clear()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._event.wait(timeout)
+
+    async def wait_async(self, timeout: float = None):
+        import asyncio
+        try:
+            await asyncio.wait_for(self._signal.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+# Settes av Bodet-frames for klokkene (start/stopp/ny verdi), så tickeren
+# planlegger på nytt med en gang i stedet for å vente ut gammel frist
+CLOCK_WAKE = ClockWake()
+
+# Våkn litt etter beregnet sifferskifte, ikke et hårstrå før
+TICK_SLACK = 0.0005
+
+
+def format_game_clock(seconds: float) -> str:
+    """
+    Kampklokke som Bodet viser den: mm:ss, og 0:ss.t i siste minutt.
+    Rundes opp, så en verdi fra Bodet står et helt steg (1 s / 0.1 s)
+    før neste siffer vises.
+    """
+    tenths = math.ceil(seconds * 10 - 1e-6)
+    if tenths < 600:
+        tenths = max(0, tenths)
+        return f"0:{tenths // 10:02d}.{tenths % 10}"
+    total = math.ceil(seconds - 1e-6)
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def next_game_clock_change(seconds: float):
+    """Sekunder til format_game_clock() viser noe nytt, eller None ved 0."""
+    if seconds <= 0:
+        return None
+    tenths = math.ceil(seconds * 10 - 1e-6)
+    if tenths < 600:
+        return seconds - (tenths - 1) / 10.0
+    # Neste hele sekund – eller overgangen til tideler ved 59.9
+    return seconds - max(math.ceil(seconds - 1e-6) - 1, 59.9)
+
 
-    # RUN/flagg (fra Bodet-status)
-    clock_running: bool = False
-    shot_running: bool = False
+def format_shot_clock(seconds: float) -> int:
+    return max(0, math.ceil(seconds - 1e-6))
 
-    home: TeamState = field(default_factory=TeamState)
-    away: TeamState = field(default_factory=TeamState)
 
-    to_home: int = 0
-    to_away: int = 0
+def next_shot_clock_change(seconds: float):
+    if seconds <= 0:
+        return None
+    return seconds - (math.ceil(seconds - 1e-6) - 1)
 
 
-@dataclass
-class Overrides:
-    # Hvis disse ikke er tomme brukes de i stedet for Bodet-navn
-    home_name: str = ""
-    away_name: str = ""
+def advance_clocks(now: float, court: "Court" = None):
+    """
+    Leser banens klokkemodeller ved now, publiserer nytt bilde ved synlig
+    endring og returnerer neste frist (monotonic) – eller None hvis ingen
+    klokke går. Kalles med banens lås holdt.
+    """
+    court = court or DEFAULT_COURT
+    state = court.state
+    game_clock = court.game_clock
+    shot_clock = court.shot_clock
+    updated = ()
+    waits = []
 
-    # Player overrides per lag: draktnummer -> navn (for fremtidige overlays)
-    players_home: Dict[int, str] = field(default_factory=dict)
-    players_away: Dict[int, str] = field(default_factory=dict)
+    # Kampklokke
+    if game_clock.running and state.clock_seconds > 0:
+        state.clock_seconds = game_clock.display(now)
 
-    # Flagg: bruk override-navn når de faktisk er satt
-    force_team_names: bool = True
-    force_player_names: bool = True
+        new_clock_str = format_game_clock(state.clock_seconds)
+        if new_clock_str != state.clock:
+            state.clock = new_clock_str
+            updated += ("game_clock",)
 
+        step = next_game_clock_change(state.clock_seconds)
+        if step is not None:
+            waits.append(game_clock.seconds_until(state.clock_seconds - step, now))
 
-STATE = ScoreState()
-OVERRIDES = Overrides()
+    # Skuddklokke
+    if shot_clock.running and state.shot_seconds > 0:
+        state.shot_seconds = shot_clock.display(now)
 
-_last_sent_score = {"home": 0, "away": 0}
-state_lock = threading.Lock()
+        new_shot = format_shot_clock(state.shot_seconds)
+        if new_shot != state.shot_clock:
+            state.shot_clock = new_shot
+            updated += ("shot_clock",)
 
-# ==========================================================
-#  VMIX-KLIENT
-# ==========================================================
+        step = next_shot_clock_change(state.shot_seconds)
+        if step is not None:
+            waits.append(shot_clock.seconds_until(state.shot_seconds - step, now))
 
-class VmixClient:
-    def __init__(self, host: str, port: int, input_name: str, fields: Dict[str, str]):
-        self.host = host
-        self.port = port
-        self.input = input_name
-        self.fields = fields
-        self._last_values: Dict[str, Any] = {}
+    if updated:
+        court.publish(updated)
 
-    def _set_text(self, selected_name: str, value: str):
-        try:
-            url = f"http://{self.host}:{self.port}/api/"
-            params = {
-                "Function": "SetText",
-                "Input": self.input,
-                "SelectedName": selected_name,
-                "Value": value
-            }
-            requests.get(url, params=params, timeout=0.3)
-        except Exception as e:
-            print(f"[vMix] ERROR {selected_name}: {e}")
+    return now + min(waits) + TICK_SLACK if waits else None
 
-    def _set_image(self, selected_name: str, file_path: str):
-        try:
-            url = f"http://{self.host}:{self.port}/api/"
-            params = {
-                "Function": "SetImage",
-                "Input": self.input,
-                "SelectedName": selected_name,
-                "Value": file_path
-            }
-            requests.get(url, params=params, timeout=0.3)
-        except Exception as e:
-            print(f"[vMix] ERROR SetImage {selected_name}: {e}")
 
-    def update_from_state(self, state: ScoreState):
-        """
-        Viser Bodet-lagnavn som default.
-        Bruker override-navn KUN hvis:
-          - force_team_names = True, OG
-          - minst ett av override-feltene faktisk har tekst.
-        """
-        use_overrides = (
-            OVERRIDES.force_team_names and
-            (OVERRIDES.home_name.strip() or OVERRIDES.away_name.strip())
-        )
+def advance_all_clocks(now: float):
+    """
+    advance_clocks for hver bane under banens egen lås, vMix-diff etter
+    at låsen er sluppet; tidligste frist.
+    """
+    deadline = None
+    for court in COURTS:
+        with court.lock:
+            d = advance_clocks(now, court)
+        court.vmix.update_from_snapshot(court.snapshot)
+        if d is not None and (deadline is None or d < deadline):
+            deadline = d
+    return deadline
+
+
+def clock_ticker():
+    """
+    Sover til neste synlige sifferskifte (helt sekund over 60 s, tidel i
+    siste minutt) på tvers av alle baner i stedet for å polle. Står helt
+    stille når alle klokkene er stoppet, til en Bodet-frame setter
+    CLOCK_WAKE.
+    """
+    while True:
+        CLOCK_WAKE.clear()
+        deadline = advance_all_clocks(time.monotonic())
 
-        if use_overrides:
-            home_name = OVERRIDES.home_name.strip() or state.home.name
-            away_name = OVERRIDES.away_name.strip() or state.away.name
+        if deadline is None:
+            CLOCK_WAKE.wait()
         else:
-            home_name = state.home.name
-            away_name = state.away.name
-
-        def format_period(p: int) -> str:
-            mapping = {
-                1: "1st",
-                2: "2nd",
-                3: "3rd",
-                4: "4th",
-            }
-            return mapping.get(p, f"P{p}")
-
-        snapshot = {
-            "home_name":  home_name,
-            "away_name":  away_name,
-            "home_score": str(state.home.score),
-            "away_score": str(state.away.score),
-            "period":     format_period(state.period),
-            "game_clock": state.clock,
-            "shot_clock": str(state.shot_clock),
-        }
+            CLOCK_WAKE.wait(max(0.0, deadline - time.monotonic()))
 
-        for key, value in snapshot.items():
-            sel = self.fields.get(key)
-            if not sel:
-                continue
-            last = self._last_values.get(key)
-            if last != value:
-                print(f"[vMix] {key} -> {sel} = {value}")
-                self._set_text(sel, value)
-                self._last_values[key] = value
 
+async def clock_ticker_async():
+    """Samme som clock_ticker, som asyncio-task."""
+    while True:
+        CLOCK_WAKE.clear()
+        deadline = advance_all_clocks(time.monotonic())
 
-VMIX = VmixClient(
-    CONFIG["vmix_host"],
-    CONFIG["vmix_port"],
-    CONFIG["vmix_input"],
-    CONFIG["fields"],
-)
+        if deadline is None:
+            await CLOCK_WAKE.wait_async()
+        else:
+            await CLOCK_WAKE.wait_async(max(0.0, deadline - time.monotonic()))
 
 # ==========================================================
-#  LAGFEIL-VISUAL (A_FAULS / B_FAULS med bilder)
+#  STATE-SJEKKPUNKT (mmap, fast layout)
 # ==========================================================
 
-def update_team_fouls_visual(team: str, fouls: int):
-    team_key = team.upper()
-    fouls = max(0, min(5, fouls))
-
-    base_path = CONFIG["fouls_base_path"]
-    fouls_map_all = CONFIG["fouls_files"]
-    team_map = fouls_map_all.get(team_key)
-    if not team_map:
-        print(f"[FOULS] Ingen fouls-mapping for team '{team_key}'")
-        return
-
-    file_name = team_map.get(fouls)
-    if not file_name:
-        print(f"[FOULS] Ingen fil definert for {team_key} med {fouls} fouls")
-        return
+CHECKPOINT_MAGIC = b"BDSTATE1"
+CHECKPOINT_HEADER = struct.Struct("<8sI")      # magic, slotstørrelse
+CHECKPOINT_PLAYERS = 16                        # plasser per spillerliste
+CHECKPOINT_NAME = 32                           # bytes UTF-8 per lagnavn
 
-    file_path = os.path.join(base_path, file_name)
-    selected_name = "A_FAULS.Source" if team_key == "A" else "B_FAULS.Source"
+# Per lag: navn, score, fouls, period_fouls, timeouts, antall + fouls per
+# spiller, antall + poeng per spiller (én byte per spiller, maks 2 sifre)
+_CHECKPOINT_TEAM = f"{CHECKPOINT_NAME}sHBBBB{CHECKPOINT_PLAYERS}sB{CHECKPOINT_PLAYERS}s"
 
-    print(f"[FOULS] {team_key} fouls={fouls} -> {selected_name} = {file_path}")
-    VMIX._set_image(selected_name, file_path)
+# Én slot: sekvens, veggklokke, klokketekst, period, shot_clock,
+# clock_seconds, shot_seconds, RUN-flagg, possession, timeouts,
+# last_sent_score (decode_score sin prev), hjemme, borte. CRC32 etter.
+CHECKPOINT_BODY = struct.Struct("<Qd8shhdd??BBBHH" + _CHECKPOINT_TEAM * 2)
+CHECKPOINT_CRC = struct.Struct("<I")
+CHECKPOINT_SLOT = CHECKPOINT_BODY.size + CHECKPOINT_CRC.size
 
-# ==========================================================
-#  SCOREDEKODER
-# ==========================================================
+POSSESSION_INDEX = {"": 0, "home": 1, "away": 2}
+POSSESSION_NAMES = ("", "home", "away")
 
-def decode_score(d1: int, d2: int, d3: int, prev: int) -> int:
-    """
-    Håndterer Bodet sine varianter:
+# En klokke som gikk ved krasjet fortsetter kun hvis vi var nede kortere
+# enn dette (sekunder); ellers vises siste verdi stoppet til Bodet sier noe
+CHECKPOINT_MAX_RUN_GAP = 30.0
 
-      - 0 0 4  -> 4   (enkeltsiffer)
-      - 0 4 0  -> 4   (før 10 poeng) eller 40 (etter 10)
-      - 0 1 7  -> 17  (tosifret)
-      - 0 6 5  -> 65  (tosifret)
-      - 1 0 3  -> 103 (tresifret)
-      - 1 1 4  -> 114 (tresifret)
-    """
 
-    # Alt null
-    if d1 == 0 and d2 == 0 and d3 == 0:
-        return 0
+def _team_record(team: TeamState) -> tuple:
+    fouls = team.player_fouls[:CHECKPOINT_PLAYERS]
+    points = team.player_points[:CHECKPOINT_PLAYERS]
+    # bytes() kaster ValueError for verdier utenfor 0..255
+    return (team.name.encode("utf-8")[:CHECKPOINT_NAME], team.score, team.fouls,
+            team.period_fouls, team.timeouts,
+            len(fouls), bytes(fouls), len(points), bytes(points))
 
-    # 0 x 0: før 10 poeng enkeltsiffer, etter 10: tiere
-    if d1 == 0 and d3 == 0 and d2 > 0:
-        if prev is not None and prev >= 10:
-            return d2 * 10
-        else:
-            return d2
 
-    # 0 0 x: enkeltsiffer
-    if d1 == 0 and d2 == 0 and d3 > 0:
-        return d3
+def _team_from_record(values) -> TeamState:
+    name, score, fouls, period_fouls, timeouts, n_fouls, player_fouls, n_points, points = values
+    return TeamState(
+        name=name.rstrip(b"\0").decode("utf-8", "ignore"),
+        score=score, fouls=fouls, period_fouls=period_fouls, timeouts=timeouts,
+        player_fouls=tuple(player_fouls[:n_fouls]),
+        player_points=tuple(points[:n_points]),
+    )
 
-    # 0 x y: tosifret
-    if d1 == 0:
-        return d2 * 10 + d3
 
-    # x y z: kan være tosifret (xy) eller tresifret (xyz)
-    candidate2 = d1 * 10 + d2
-    candidate3 = d1 * 100 + d2 * 10 + d3
+class StateCheckpoint:
+    """
+    Banens state og decode_score-kontekst (last_sent_score) i en liten
+    fil med fast layout, mappet i minnet. Hver write() er én pack_into i
+    page cache (overlever at prosessen dør, uten fsync per endring).
+
+    To slots skrives annenhver gang, hver med sekvensnummer og CRC32: en
+    skriving som avbrytes halvveis ødelegger kun sin egen slot, og load()
+    velger den gyldige med høyest sekvens. Filen lages ved første write(),
+    så import alene aldri skriver noe.
+    """
 
-    # Hvis vi ikke har tidligere verdi, bruk heuristikk
-    if prev is None:
-        return candidate3
+    def __init__(self, path: str):
+        self.path = path
+        self._mm = None
+        self._file = None
+        self._seq = 0
+        self.writes = 0
+        self.errors = 0
 
-    def is_small_step(new: int, old: int) -> bool:
-        diff = new - old
-        return 0 <= diff <= 3
+    def load(self):
+        """(ScoreState, last_sent_score, sekunder siden skriving) eller None."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) != CHECKPOINT_HEADER.size + 2 * CHECKPOINT_SLOT:
+            return None
+        magic, slot_size = CHECKPOINT_HEADER.unpack_from(data)
+        if magic != CHECKPOINT_MAGIC or slot_size != CHECKPOINT_SLOT:
+            return None
+
+        best = None
+        for slot in range(2):
+            offset = CHECKPOINT_HEADER.size + slot * CHECKPOINT_SLOT
+            body = data[offset:offset + CHECKPOINT_BODY.size]
+            (crc,) = CHECKPOINT_CRC.unpack_from(data, offset + CHECKPOINT_BODY.size)
+            if zlib.crc32(body) != crc:
+                continue
+            values = CHECKPOINT_BODY.unpack(body)
+            if best is None or values[0] > best[0]:
+                best = values
+        if best is None:
+            return None
+
+        (seq, written, clock, period, shot_clock, clock_seconds, shot_seconds,
+         clock_running, shot_running, possession, to_home, to_away,
+         last_home, last_away) = best[:14]
+        state = ScoreState(
+            clock=clock.rstrip(b"\0").decode("ascii", "ignore"),
+            period=period, shot_clock=shot_clock,
+            clock_seconds=clock_seconds, shot_seconds=shot_seconds,
+            clock_running=clock_running, shot_running=shot_running,
+            home=_team_from_record(best[14:23]),
+            away=_team_from_record(best[23:32]),
+            to_home=to_home, to_away=to_away,
+            possession=POSSESSION_NAMES[possession] if possession < 3 else "",
+        )
+        self._seq = seq
+        return state, {"home": last_home, "away": last_away}, time.time() - written
 
-    # Hvis forrige score var >= 100, foretrekk alltid tresifret tolkning
-    if prev >= 100:
-        if is_small_step(candidate3, prev):
-            return candidate3
-        # Selv om ikke småsteg, bruk tresifret hvis vi allerede er over 100
-        return candidate3
-    
-    # Hvis forrige score var 90-99, kan vi gå over til 100+
-    if prev >= 90:
-        if is_small_step(candidate3, prev):
-            return candidate3
-        if is_small_step(candidate2, prev):
-            return candidate2
-        # Foretrekk tresifret hvis vi er nær 100
-        return candidate3 if candidate3 >= 100 else candidate2
-    
-    # Under 90: bruk tosifret tolkning
-    if is_small_step(candidate2, prev):
-        return candidate2
-    if is_small_step(candidate3, prev):
-        return candidate3
-    return candidate2 if abs(candidate2 - prev) < abs(candidate3 - prev) else candidate2
+    def _open(self):
+        size = CHECKPOINT_HEADER.size + 2 * CHECKPOINT_SLOT
+        try:
+            f = open(self.path, "r+b")
+        except FileNotFoundError:
+            f = open(self.path, "w+b")
+        f.seek(0, os.SEEK_END)
+        if f.tell() != size:
+            f.truncate(0)
+            f.write(bytes(size))
+            f.flush()
+        self._mm = mmap.mmap(f.fileno(), size)
+        CHECKPOINT_HEADER.pack_into(self._mm, 0, CHECKPOINT_MAGIC, CHECKPOINT_SLOT)
+        self._file = f
+        atexit.register(self.close)
+
+    def write(self, state: ScoreState, last_sent: Dict[str, int]):
+        """Kalles med banens lås holdt, etter hver publisert endring."""
+        if self._mm is None:
+            try:
+                self._open()
+            except (OSError, ValueError) as e:
+                self.errors += 1
+                log_main.error("[SJEKKPUNKT] Kan ikke åpne %s: %s", self.path, e)
+                return
+        self._seq += 1
+        offset = CHECKPOINT_HEADER.size + (self._seq & 1) * CHECKPOINT_SLOT
+        try:
+            CHECKPOINT_BODY.pack_into(
+                self._mm, offset, self._seq, time.time(), state.clock.encode("ascii", "replace"),
+                state.period, state.shot_clock, state.clock_seconds, state.shot_seconds,
+                state.clock_running, state.shot_running,
+                POSSESSION_INDEX.get(state.possession, 0), state.to_home, state.to_away,
+                last_sent["home"], last_sent["away"],
+                *_team_record(state.home), *_team_record(state.away))
+        except (struct.error, ValueError) as e:
+            # Verdi utenfor layouten: behold forrige gyldige slot
+            self.errors += 1
+            log_main.debug("[SJEKKPUNKT] Hoppet over: %s", e)
+            return
+        mm = self._mm
+        CHECKPOINT_CRC.pack_into(mm, offset + CHECKPOINT_BODY.size,
+                                 zlib.crc32(mm[offset:offset + CHECKPOINT_BODY.size]))
+        self.writes += 1
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+
+def checkpoint_path(cfg: Dict[str, Any], multi: bool) -> str:
+    """Sjekkpunktfil for en bane ("" = av); ekstra baner skilles på port."""
+    path = cfg.get("state_checkpoint")
+    if not path:
+        return ""
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+    if multi and cfg is not CONFIG:
+        root, ext = os.path.splitext(path)
+        path = f"{root}_{cfg['listen_port']}{ext}"
+    return path
+
+
+def restore_court(court: "Court", checkpoint: StateCheckpoint, max_age: float) -> bool:
+    """
+    Leser sjekkpunktet inn i en ny bane. Klokker som gikk fortsetter fra
+    verdien de ville hatt nå (hvis nedetiden var kort); første Bodet-frame
+    retter resten. Et sjekkpunkt eldre enn max_age sekunder brukes ikke
+    (alderen legges i court.stale_checkpoint for loggen).
+    """
+    loaded = checkpoint.load()
+    if loaded is None:
+        return False
+    state, last_sent, age = loaded
+    if age > max_age:
+        court.stale_checkpoint = age
+        return False
+    court.state = state
+    court.last_sent_score.update(last_sent)
+
+    keep_running = 0.0 <= age <= CHECKPOINT_MAX_RUN_GAP
+    if state.clock_running:
+        seconds = max(0.0, state.clock_seconds - age) if keep_running else state.clock_seconds
+        sync_game_clock(seconds, keep_running, format_game_clock(seconds), court)
+    if state.shot_running:
+        seconds = max(0.0, state.shot_seconds - age) if keep_running else state.shot_seconds
+        sync_shot_clock(seconds, keep_running, court)
+    return True
 
 # ==========================================================
-#  BODET-PARSER – HOVEDLOGIKK
+#  BANER (én Scorepad + én vMix-input per bane)
 # ==========================================================
 
-def apply_bodet_message(_msg_id: int, msg: bytes):
-    global STATE, _last_sent_score
-
-    if len(msg) < 2:
-        return
-
-    try:
-        nid = (msg[0] - 48) * 10 + (msg[1] - 48)
-    except Exception:
-        return
+class Court:
+    """
+    Én bane: egen Scorepad-port, state, overrides, klokkemodeller og
+    vMix-input med feltmapping (fra cfg). Sender og vMix-forbindelser
+    deles med de andre banene. Med multi=True merkes logg og latensfelt
+    med banenavnet.
+    """
 
-    with state_lock:
-        # 18 – hovedklokke / timeouts / periode
-        if nid == 18:
-            print("[BODET 18] len=", len(msg),
-                  "data=", " ".join(f"{b:02X}" for b in msg))
+    def __init__(self, name: str, cfg: Dict[str, Any], sender: VmixFanout,
+                 multi: bool = False):
+        self.name = name
+        self.cfg = cfg
+        self.tag = f"[{name}] " if multi else ""
+
+        self.state = ScoreState()          # skrivernes arbeidskopi (under lock)
+        self.snapshot = StateSnapshot.initial(state_fields(self.state))
+        self.overrides = Overrides()
+        self.last_sent_score = {"home": 0, "away": 0}
+        self.metrics = CourtMetrics()
+        # Med metrikk-endepunktet på måles vente- og holdetid på låsen
+        if cfg["metrics_port"]:
+            self.lock = TimedLock(self.metrics.lock_wait, self.metrics.lock_hold)
+        else:
+            self.lock = threading.Lock()
+
+        self.game_clock = ClockModel("game",
+                                     snap_threshold=cfg["clock_snap_threshold"],
+                                     slew_time=cfg["clock_slew_time"],
+                                     jump_threshold=cfg["clock_jump_threshold"])
+        self.shot_clock = ClockModel("shot",
+                                     snap_threshold=cfg["clock_snap_threshold"],
+                                     slew_time=cfg["clock_slew_time"],
+                                     jump_threshold=cfg["clock_jump_threshold"])
+        self.layout = build_layout(cfg)
+        self.vmix = VmixClient(cfg["vmix_input"], self.layout, sender, self.overrides,
+                               label=f"{name}/" if multi else "")
+
+        path = checkpoint_path(cfg, multi)
+        self.checkpoint = StateCheckpoint(path) if path else None
+        self.stale_checkpoint = None
+        self.restored = self.checkpoint is not None and restore_court(
+            self, self.checkpoint, cfg["state_checkpoint_max_age"])
+        if self.restored:
+            self.snapshot = StateSnapshot.initial(state_fields(self.state))
+
+    def reconfigure(self, cfg: Dict[str, Any], layout: Dict[str, Tuple[Binding, ...]] = None):
+        """
+        Ny konfigurasjon for banen. State, klokker, overrides og
+        last_sent_score beholdes; layout=None betyr uendret mapping.
+        Kalles med self.lock holdt.
+        """
+        self.cfg = cfg
+        for model in (self.game_clock, self.shot_clock):
+            model.snap_threshold = cfg["clock_snap_threshold"]
+            model.slew_time = cfg["clock_slew_time"]
+            model.jump_threshold = cfg["clock_jump_threshold"]
+        if layout is not None:
+            self.layout = layout
+            return self.vmix.relayout(cfg["vmix_input"], layout, self.snapshot)
+        return ()
+
+    def publish(self, fields: Tuple[str, ...] = None) -> StateSnapshot:
+        """
+        Publiser state som nytt bilde (kalles med self.lock holdt).
+        fields: de logiske feltene skriveren endret; None = sammenlign alle.
+        """
+        old = self.snapshot
+        if fields is None:
+            self.snapshot = old.next(state_fields(self.state))
+        else:
+            state = self.state
+            self.snapshot = old.update(
+                {logical: STATE_FIELDS[logical](state) for logical in fields})
+        if self.snapshot is not old and self.checkpoint is not None:
+            self.checkpoint.write(self.state, self.last_sent_score)
+        return self.snapshot
 
-            if len(msg) < 8:
-                return
 
-            status = msg[2]
-            running = not bool(status & 0x02)  # bit 1 = RUN (invertert: 0=kjører, 1=stoppet)
-
-            # mm:ss
-            minutes = dig(msg[4]) * 10 + dig(msg[5])
-            seconds = dig(msg[6]) * 10 + dig(msg[7])
-            STATE.clock_seconds = float(minutes * 60 + seconds)
-            STATE.clock_running = running
-            STATE.clock = f"{minutes:02d}:{seconds:02d}"
-
-            # timeouts (hvis tilstede)
-            if len(msg) >= 10:
-                STATE.to_home = dig(msg[8])
-                STATE.to_away = dig(msg[9])
-
-            # periode (typisk index 12, fallback 13)
-            period = 0
-            if len(msg) > 12:
-                period = dig(msg[12])
-            if period == 0 and len(msg) > 13:
-                period = dig(msg[13])
-
-            if period > 0:
-                if period != STATE.period:
-                    STATE.home.period_fouls = 0
-                    STATE.away.period_fouls = 0
-                STATE.period = period
-
-            VMIX.update_from_state(STATE)
-
-        # 30 – lag-score
-        elif nid == 30:
-            if len(msg) < 9:
-                return
+def court_configs(cfg: Dict[str, Any]):
+    """
+    [(navn, cfg), ...]: første bane er cfg selv, deretter én per
+    oppføring i cfg["courts"], som arver alle øvrige nøkler fra cfg.
+    """
+    out = [(cfg.get("court_name", "Bane 1"), cfg)]
+    for i, extra in enumerate(cfg.get("courts", []), start=2):
+        merged = dict(cfg)
+        merged.update(extra)
+        out.append((extra.get("name", f"Bane {i}"), merged))
+
+    ports = [(c["listen_host"], c["listen_port"]) for _name, c in out]
+    if len(set(ports)) != len(ports):
+        raise ValueError(f"Banene må ha hver sin listen_port: {ports}")
+    # Samme input på delte vMix-maskiner ville latt banene skrive over hverandre
+    inputs = [str(c["vmix_input"]) for _name, c in out]
+    if len(set(inputs)) != len(inputs):
+        raise ValueError(f"Banene må ha hver sin vmix_input: {inputs}")
+    return out
+
+
+def make_courts(cfg: Dict[str, Any], sender: VmixFanout):
+    configs = court_configs(cfg)
+    multi = len(configs) > 1
+    return [Court(name, court_cfg, sender, multi) for name, court_cfg in configs]
+
+
+COURTS = make_courts(CONFIG, VMIX_FANOUT)
+DEFAULT_COURT = COURTS[0]
+
+# Navnene fra før flerbanestøtten peker på første bane
+STATE = DEFAULT_COURT.state
+OVERRIDES = DEFAULT_COURT.overrides
+VMIX = DEFAULT_COURT.vmix
+_last_sent_score = DEFAULT_COURT.last_sent_score
+state_lock = DEFAULT_COURT.lock
+GAME_CLOCK = DEFAULT_COURT.game_clock
+SHOT_CLOCK = DEFAULT_COURT.shot_clock
 
-            # Hjemmelag
-            h1 = dig(msg[3])
-            h2 = dig(msg[4])
-            h3 = dig(msg[5])
+# ==========================================================
+#  HOT RELOAD AV KONFIGURASJON
+# ==========================================================
 
-            # Bortelag
-            a1 = dig(msg[6])
-            a2 = dig(msg[7])
-            a3 = dig(msg[8])
+# Kan ikke endres mens gatewayen går (porter, kjerne, antall baner/maskiner)
+RESTART_KEYS = ("core", "listen_host", "listen_port", "court_name", "state_checkpoint",
+                "metrics_host", "metrics_port", "vmix_name", "vmix_reconcile_interval")
+# Per bane: bygger layouten på nytt
+LAYOUT_KEYS = ("vmix_input", "fields", "fouls_base_path", "fouls_files", "fouls_fields", "layout")
+# Per vMix-maskin: ny forbindelse
+TRANSPORT_KEYS = ("vmix_transport", "vmix_host", "vmix_port", "vmix_tcp_port",
+                  "vmix_http_pool_size", "vmix_connect_timeout", "vmix_read_timeout",
+                  "vmix_tcp_ack_timeout")
+SENDER_KEYS = ("vmix_retry_interval", "vmix_down_after", "vmix_field_rate",
+               "vmix_rps_budget", "vmix_throttle_bypass", "vmix_priority")
 
-            nh = decode_score(h1, h2, h3, _last_sent_score["home"])
-            na = decode_score(a1, a2, a3, _last_sent_score["away"])
 
-            STATE.home.score = nh
-            STATE.away.score = na
+def _changed(old: Dict[str, Any], new: Dict[str, Any], keys) -> bool:
+    return any(old.get(key) != new.get(key) for key in keys)
 
-            if nh != _last_sent_score["home"]:
-                diff = nh - _last_sent_score["home"]
-                _last_sent_score["home"] = nh
-                print(f"[EVENT] HOME SCORE +{diff} -> {nh}")
 
-            if na != _last_sent_score["away"]:
-                diff = na - _last_sent_score["away"]
-                _last_sent_score["away"] = na
-                print(f"[EVENT] AWAY SCORE +{diff} -> {na}")
+def apply_config(new: Dict[str, Any]) -> bool:
+    """
+    Tar i bruk en ny konfigurasjon uten å slippe Scorepad-forbindelser
+    eller state. Alt nytt (layouter, transporter) bygges først; feiler
+    noe, eller krever endringen omstart, beholdes den gamle helt. Deretter
+    byttes alt på én gang, og kun felt med endret binding sendes på nytt
+    (alle felt til en maskin med ny adresse, eller til en ny input).
+    asyncio-kjernen kaller den på event-loopen; trådkjernen fra
+    config_watcher sin tråd, så byttet gjøres med alle banenes låser
+    holdt (parser og ticker står da mellom to frames). Returnerer True
+    hvis tatt i bruk; ugyldige verdier gir ValueError før noe er byttet.
+    """
+    old = CONFIG
+    new = validate_config(new)
+    new_courts = court_configs(new)
+    new_dests = vmix_destination_configs(new)
+    old_dests = vmix_destination_configs(old)
+
+    restart = [key for key in RESTART_KEYS if old.get(key) != new.get(key)]
+    if ([(name, c["listen_host"], c["listen_port"]) for name, c in new_courts] !=
+            [(court.name, court.cfg["listen_host"], court.cfg["listen_port"]) for court in COURTS]):
+        restart.append("courts")
+    if [name for name, _c in new_dests] != [sender.name for sender in VMIX_FANOUT.senders]:
+        restart.append("vmix_destinations")
+    if restart:
+        log_main.error("[CONFIG] Endring i %s krever omstart; ingenting er endret",
+                       ", ".join(restart))
+        return False
+
+    # 1) Bygg alt som kan feile
+    layouts = [build_layout(cfg) if _changed(court.cfg, cfg, LAYOUT_KEYS) else None
+               for court, (_name, cfg) in zip(COURTS, new_courts)]
+    transports = [make_vmix_transport(cfg) if _changed(old_cfg, cfg, TRANSPORT_KEYS) else None
+                  for (_n, old_cfg), (_name, cfg) in zip(old_dests, new_dests)]
+    senders = [_changed(old_cfg, cfg, SENDER_KEYS)
+               for (_n, old_cfg), (_name, cfg) in zip(old_dests, new_dests)]
+    changed = [key for key in new if old.get(key) != new[key]]
+
+    # 2) Bytt, med alle baner låst i fast rekkefølge
+    with ExitStack() as locks:
+        for court in COURTS:
+            locks.enter_context(court.lock)
+        CONFIG.update(new)
+        setup_logging(CONFIG)
+        LATENCY.enabled = CONFIG["latency_tracing"]
+        for sender, (_name, cfg), transport, policy in zip(VMIX_FANOUT.senders, new_dests,
+                                                           transports, senders):
+            if transport is not None or policy:
+                sender.reconfigure(transport, **sender_policy(cfg))
+        for i, (court, (_name, cfg), layout) in enumerate(zip(COURTS, new_courts, layouts)):
+            # Første bane bruker CONFIG selv, så lesere av CONFIG og court.cfg er enige
+            dirty = court.reconfigure(CONFIG if i == 0 else cfg, layout)
+            if dirty:
+                log_main.info("[CONFIG] %sSender på nytt: %s", court.tag, ", ".join(dirty))
+
+    log_main.info("[CONFIG] Ny konfigurasjon i bruk (endret: %s)",
+                  ", ".join(changed) if changed else "ingenting")
+    return True
+
+
+def reload_config(path: str = None) -> bool:
+    """Les filen og ta den i bruk; ugyldig fil logges og gamle verdier beholdes."""
+    path = path or CONFIG_FILE
+    try:
+        if config_stamp(path) is not None:
+            new = load_config_file(path)
+        else:
+            new = copy.deepcopy(CONFIG_DEFAULTS)   # filen er fjernet
+        return apply_config(new)
+    except Exception as e:
+        log_main.error("[CONFIG] Kunne ikke bruke %s, beholder gammel konfigurasjon: %s",
+                       path, e)
+        return False
 
-            VMIX.update_from_state(STATE)
 
-        # 31 – lagfeil
-        elif nid == 31:
-            if len(msg) < 7:
-                return
+def config_watcher(path: str = None):
+    """
+    Sjekker filen hvert config_poll_interval sekund (trådkjernen). Kaller
+    apply_config fra denne tråden; den låser banene selv under byttet.
+    """
+    path = path or CONFIG_FILE
+    stamp = config_stamp(path)
+    while True:
+        time.sleep(CONFIG["config_poll_interval"])
+        now = config_stamp(path)
+        if now != stamp:
+            stamp = now
+            log_main.info("[CONFIG] %s endret, laster på nytt", path)
+            reload_config(path)
+
+
+async def config_watcher_async(path: str = None):
+    """Samme som config_watcher, som asyncio-task (apply på event-loopen)."""
+    import asyncio
+    path = path or CONFIG_FILE
+    stamp = config_stamp(path)
+    while True:
+        await asyncio.sleep(CONFIG["config_poll_interval"])
+        now = config_stamp(path)
+        if now != stamp:
+            stamp = now
+            log_main.info("[CONFIG] %s endret, laster på nytt", path)
+            reload_config(path)
 
-            STATE.home.fouls = dig(msg[4])
-            STATE.away.fouls = dig(msg[6])
+# ==========================================================
+#  OPPTAK AV SCOREPAD-TRAFIKK
+# ==========================================================
 
-            STATE.home.period_fouls = max(STATE.home.period_fouls, STATE.home.fouls)
-            STATE.away.period_fouls = max(STATE.away.period_fouls, STATE.away.fouls)
+CAPTURE_MAGIC = b"BDCAP01\n"
+CAPTURE_RECORD = struct.Struct("<dI")
 
-            print(f"[EVENT] TEAM FOULS: H={STATE.home.fouls} A={STATE.away.fouls}")
 
-            update_team_fouls_visual("A", STATE.home.fouls)
-            update_team_fouls_visual("B", STATE.away.fouls)
+class BodetCapture:
+    """
+    Skriver mottatte TCP-biter med monotone tidsstempler til fil.
 
-            VMIX.update_from_state(STATE)
+    Format (.bdcap): CAPTURE_MAGIC, deretter poster med
+    CAPTURE_RECORD ("<dI": sekunder siden start, lengde) + rå bytes.
+    Leses med read_capture().
+    """
 
-        # 36 – siste minutt, tideler (0:ss.t)
-        elif nid == 36:
-            if len(msg) < 6:
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "wb")
+        self._f.write(CAPTURE_MAGIC)
+        self._t0 = time.monotonic()
+        self._last_flush = self._t0
+
+    def write(self, data: bytes, now: float = None):
+        if now is None:
+            now = time.monotonic()
+        self._f.write(CAPTURE_RECORD.pack(now - self._t0, len(data)))
+        self._f.write(data)
+        # Flush maks én gang i sekundet; billig på hot path
+        if now - self._last_flush >= 1.0:
+            self._f.flush()
+            self._last_flush = now
+
+    def close(self):
+        self._f.close()
+
+
+def open_capture_for_connection(addr, court: "Court" = None) -> BodetCapture:
+    capture_dir = CONFIG.get("capture_dir")
+    if not capture_dir:
+        return None
+    court = court or DEFAULT_COURT
+    os.makedirs(capture_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    # Flere baner: portnummeret skiller opptakene fra hverandre
+    port = f"_{court.cfg['listen_port']}" if court.tag else ""
+    path = os.path.join(capture_dir, f"bodet_{stamp}_{addr[0]}{port}.bdcap")
+    log_capture.info("[CAPTURE] Tar opp Scorepad-trafikk til %s", path)
+    return BodetCapture(path)
+
+
+def read_capture(path: str) -> Iterator[Tuple[float, bytes]]:
+    """Gir (sekunder siden start, rå bytes) for hver post i en .bdcap-fil."""
+    with open(path, "rb") as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} er ikke en Bodet-capture")
+        while True:
+            head = f.read(CAPTURE_RECORD.size)
+            if len(head) < CAPTURE_RECORD.size:
                 return
-            status = msg[2]
-            running = not bool(status & 0x02)  # bit 1 = RUN (invertert: 0=kjører, 1=stoppet)
-
-            seconds = dig(msg[3]) * 10 + dig(msg[4])
-            tenths = dig(msg[5])
-            STATE.clock_seconds = float(seconds) + tenths / 10.0
-            STATE.clock_running = running
-            STATE.clock = f"0:{seconds:02d}.{tenths}"
-            VMIX.update_from_state(STATE)
-
-        # 50 – shot clock
-        elif nid == 50:
-            if len(msg) < 5:
+            t, length = CAPTURE_RECORD.unpack(head)
+            data = f.read(length)
+            if len(data) < length:
                 return
-            status = msg[2]
-            running = not bool(status & 0x02)  # bit 1 = RUN (invertert: 0=kjører, 1=stoppet)
-
-            shot = dig(msg[3]) * 10 + dig(msg[4])
-            STATE.shot_seconds = float(shot)
-            STATE.shot_running = running
-            STATE.shot_clock = shot
-            VMIX.update_from_state(STATE)
-
-        # 98/99 – lagnavn
-        elif nid == 98:
-            name_bytes = msg[2:20]
-            try:
-                STATE.home.name = name_bytes.decode(errors="ignore").strip()
-            except Exception:
-                pass
-            VMIX.update_from_state(STATE)
-
-        elif nid == 99:
-            name_bytes = msg[2:20]
-            try:
-                STATE.away.name = name_bytes.decode(errors="ignore").strip()
-            except Exception:
-                pass
-            VMIX.update_from_state(STATE)
+            yield t, data
 
 # ==========================================================
-#  LOKAL NEDTELLING FOR KLOKKE / SHOTCLOCK
+#  FRAMING
 # ==========================================================
 
-def clock_ticker():
-    last = time.monotonic()
-    while True:
-        time.sleep(0.1)
-        now = time.monotonic()
-        dt = now - last
-        last = now
+class BodetFramer:
+    """
+    Inkrementell framer for Bodet TV-protokollen: SOH ... STX x <nyttelast> ETX.
 
-        with state_lock:
-            updated = False
+    Data legges i én gjenbrukt bytearray med lesepeker, og nyttelast
+    leveres som memoryview inn i bufferen – ingen kopiering per frame.
+    Forbrukte bytes fjernes først når lesepekeren passerer
+    compact_threshold (eller alt er lest), så bursts etter reconnect
+    koster lineært, ikke kvadratisk.
 
-            # Kampklokke
-            if STATE.clock_running and STATE.clock_seconds > 0:
-                STATE.clock_seconds = max(0.0, STATE.clock_seconds - dt)
+    NB: memoryview-ene er kun gyldige frem til neste feed().
+    """
 
-                if STATE.clock_seconds >= 60.0:
-                    m = int(STATE.clock_seconds // 60)
-                    s = int(STATE.clock_seconds % 60)
-                    new_clock_str = f"{m:02d}:{s:02d}"
-                else:
-                    total_tenths = int(round(STATE.clock_seconds * 10))
-                    if total_tenths < 0:
-                        total_tenths = 0
-                    sec = total_tenths // 10
-                    tenth = total_tenths % 10
-                    if sec > 59:
-                        sec = 59
-                    new_clock_str = f"0:{sec:02d}.{tenth}"
-
-                if new_clock_str != STATE.clock:
-                    STATE.clock = new_clock_str
-                    updated = True
-
-            # Skuddklokke
-            if STATE.shot_running and STATE.shot_seconds > 0:
-                STATE.shot_seconds = max(0.0, STATE.shot_seconds - dt)
-                new_shot = max(0, int(round(STATE.shot_seconds)))
-                if new_shot != STATE.shot_clock:
-                    STATE.shot_clock = new_shot
-                    updated = True
-
-            if updated:
-                VMIX.update_from_state(STATE)
+    SOH, STX, ETX = 0x01, 0x02, 0x03
+
+    def __init__(self, compact_threshold: int = 4096):
+        self._buf = bytearray()
+        self._pos = 0
+        self.compact_threshold = compact_threshold
+
+        self.frames_ok = 0
+        self.frames_bad = 0
+
+    def __len__(self) -> int:
+        return len(self._buf) - self._pos
+
+    def _compact(self):
+        try:
+            del self._buf[:self._pos]
+        except BufferError:
+            # Noen holder fortsatt på en gammel nyttelast – la den beholde
+            # den gamle bufferen og fortsett på en kopi
+            self._buf = bytearray(memoryview(self._buf)[self._pos:])
+        self._pos = 0
+
+    def feed(self, data) -> Iterator[memoryview]:
+        """Legg til mottatte bytes og returner en iterator over nye nyttelaster."""
+        if self._pos and (self._pos >= self.compact_threshold or self._pos == len(self._buf)):
+            self._compact()
+        try:
+            self._buf += data
+        except BufferError:
+            self._buf = bytearray(memoryview(self._buf)[self._pos:])
+            self._pos = 0
+            self._buf += data
+        return self._frames()
+
+    def _frames(self) -> Iterator[memoryview]:
+        buf = self._buf
+        view = memoryview(buf)
+        SOH, STX, ETX = self.SOH, self.STX, self.ETX
+        try:
+            while True:
+                start = buf.find(SOH, self._pos)
+                if start == -1:
+                    self._pos = len(buf)
+                    return
+                end = buf.find(ETX, start + 1)
+                if end == -1:
+                    self._pos = start
+                    return
+                self._pos = end + 1
+
+                stx_index = buf.find(STX, start + 1, end)
+                if stx_index == -1:
+                    self.frames_bad += 1
+                    log_parse.warning("[PARSE] Fant SOH/ETX men ingen STX, skipper frame")
+                    continue
+                if stx_index + 2 >= end:
+                    self.frames_bad += 1
+                    log_parse.warning("[PARSE] Frame for kort til nyttelast, skipper")
+                    continue
+
+                self.frames_ok += 1
+                yield view[stx_index + 2:end]
+        finally:
+            view.release()
 
 # ==========================================================
 #  TCP-PARSING
 # ==========================================================
 
-def parse_stream_and_apply(conn: socket.socket):
-    buffer = b""
-    SOH, STX, ETX = 0x01, 0x02, 0x03
-
-    print("[TCP] Klar til å motta data fra Scorepad ...")
-
-    while True:
-        data = conn.recv(1024)
-        if not data:
-            print("[TCP] Scorepad koblet fra (recv=0 bytes)")
-            break
+def parse_stream_and_apply(conn: socket.socket, capture: BodetCapture = None,
+                           court: "Court" = None):
+    court = court or DEFAULT_COURT
+    metrics = court.metrics
+    framer = BodetFramer()
+    metrics.connection_opened(framer)
 
-        print(f"[TCP] Mottok {len(data)} bytes: {data!r}")
-        buffer += data
+    log_tcp.info("%s[TCP] Klar til å motta data fra Scorepad ...", court.tag)
 
+    try:
         while True:
-            start = buffer.find(bytes([SOH]))
-            if start == -1:
-                buffer = b""
-                break
-            end = buffer.find(bytes([ETX]), start + 1)
-            if end == -1:
-                if start > 0:
-                    buffer = buffer[start:]
+            data = conn.recv(1024)
+            t_recv = time.monotonic()
+            if not data:
+                log_tcp.info("%s[TCP] Scorepad koblet fra (recv=0 bytes)", court.tag)
                 break
+            metrics.bytes_received += len(data)
 
-            frame = buffer[start:end + 1]
-            buffer = buffer[end + 1:]
+            if capture is not None:
+                capture.write(data)
 
-            stx_index = frame.find(bytes([STX]), 1, -1)
-            if stx_index == -1:
-                print("[PARSE] Fant SOH/ETX men ingen STX, skipper frame")
-                continue
-            if stx_index + 2 >= len(frame) - 1:
-                print("[PARSE] Frame for kort til nyttelast, skipper")
-                continue
+            log_tcp.debug("[TCP] Mottok %d bytes: %r", len(data), data)
+            raw_debug = log_raw.isEnabledFor(logging.DEBUG)
 
-            payload = frame[stx_index + 2:-1]
-            if len(payload) >= 2:
-                try:
-                    nid = (payload[0] - 48) * 10 + (payload[1] - 48)
-                except Exception:
-                    nid = -1
-                print(f"[RAW] nid={nid} len={len(payload)} payload={payload!r}")
-            else:
-                print(f"[RAW] payload for kort: {payload!r}")
+            for payload in framer.feed(data):
+                trace = FrameTrace(t_recv) if LATENCY.enabled else None
+                if raw_debug:
+                    if len(payload) >= 2:
+                        nid = (payload[0] - 48) * 10 + (payload[1] - 48)
+                        log_raw.debug("[RAW] nid=%d len=%d payload=%r", nid, len(payload), bytes(payload))
+                    else:
+                        log_raw.debug("[RAW] payload for kort: %r", bytes(payload))
 
-            apply_bodet_message(0, payload)
+                apply_bodet_message(0, payload, trace, court)
+    finally:
+        metrics.connection_closed(framer)
 
 
-def start_bodet_server():
-    host = CONFIG["listen_host"]
-    port = CONFIG["listen_port"]
+def open_bodet_listener(court: "Court" = None) -> socket.socket:
+    """Binder og lytter på banens port (kalles før noe annet startes)."""
+    court = court or DEFAULT_COURT
+    host = court.cfg["listen_host"]
+    port = court.cfg["listen_port"]
 
     srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     srv.bind((host, port))
     srv.listen(1)
 
-    print(f"[TCP] Lytter på {host}:{port} for Scorepad (Protocol TV) ...")
+    log_tcp.info("%s[TCP] Lytter på %s:%s for Scorepad (Protocol TV) etter %.0f ms ...",
+                 court.tag, host, port, (time.monotonic() - STARTED_AT) * 1000)
+    return srv
+
+
+def start_bodet_server(court: "Court" = None):
+    court = court or DEFAULT_COURT
+    serve_bodet_listener(open_bodet_listener(court), court)
+
+
+def serve_bodet_listener(srv: socket.socket, court: "Court" = None):
+    court = court or DEFAULT_COURT
+    tag = court.tag
 
     while True:
-        print("[TCP] Venter på tilkobling fra Scorepad ...")
+        log_tcp.info("%s[TCP] Venter på tilkobling fra Scorepad ...", tag)
         try:
             conn, addr = srv.accept()
         except Exception as e:
-            print(f"[TCP] accept() FEIL: {e}")
+            log_tcp.error("%s[TCP] accept() FEIL: %s", tag, e)
             continue
 
-        print(f"[TCP] Scorepad tilkoblet fra {addr}")
+        log_tcp.info("%s[TCP] Scorepad tilkoblet fra %s", tag, addr)
+        capture = None
         try:
-            parse_stream_and_apply(conn)
+            capture = open_capture_for_connection(addr, court)
+            parse_stream_and_apply(conn, capture, court)
         except Exception as e:
-            print(f"[TCP] ERROR i parse_stream_and_apply: {e}")
+            log_tcp.error("%s[TCP] ERROR i parse_stream_and_apply: %s", tag, e)
         finally:
+            if capture is not None:
+                capture.close()
             conn.close()
-            print("[TCP] Forbindelse lukket, venter på ny ...")
+            log_tcp.info("%s[TCP] Forbindelse lukket, venter på ny ...", tag)
+
+# ==========================================================
+#  ASYNCIO-KJERNE
+# ==========================================================
+
+async def handle_scorepad_async(reader: "asyncio.StreamReader", writer: "asyncio.StreamWriter",
+                                court: "Court" = None):
+    """Én Scorepad-tilkobling; hver tilkobling har sin egen framer."""
+    import asyncio
+    court = court or DEFAULT_COURT
+    tag = court.tag
+    addr = writer.get_extra_info("peername")
+    log_tcp.info("%s[TCP] Scorepad tilkoblet fra %s", tag, addr)
+
+    metrics = court.metrics
+    framer = BodetFramer()
+    metrics.connection_opened(framer)
+    capture = None
+    try:
+        capture = open_capture_for_connection(addr, court)
+        while True:
+            data = await reader.read(1024)
+            t_recv = time.monotonic()
+            if not data:
+                log_tcp.info("%s[TCP] Scorepad %s koblet fra (recv=0 bytes)", tag, addr)
+                break
+            metrics.bytes_received += len(data)
+
+            if capture is not None:
+                capture.write(data)
+            log_tcp.debug("[TCP] Mottok %d bytes fra %s: %r", len(data), addr, data)
+
+            for payload in framer.feed(data):
+                trace = FrameTrace(t_recv) if LATENCY.enabled else None
+                apply_bodet_message(0, payload, trace, court)
+    except asyncio.CancelledError:
+        # Kjernen avslutter (SIGTERM): lukk stille, ingen traceback
+        log_tcp.debug("%s[TCP] Scorepad %s avbrutt ved avslutning", tag, addr)
+    except Exception as e:
+        log_tcp.error("%s[TCP] ERROR i Scorepad-tilkobling %s: %s", tag, addr, e)
+    finally:
+        metrics.connection_closed(framer)
+        if capture is not None:
+            capture.close()
+        writer.close()
+        log_tcp.info("%s[TCP] Forbindelse fra %s lukket", tag, addr)
+
+
+async def debug_printer_async():
+    import asyncio
+    while True:
+        await asyncio.sleep(5)
+        log_stats_summary()
+
+
+async def run_async_core_main():
+    import asyncio
+    loop = asyncio.get_running_loop()
+    CORE_BRIDGE.loop = loop
+    CLOCK_WAKE.attach_loop(loop)
+
+    stop = asyncio.Event()
+    if threading.current_thread() is threading.main_thread():
+        # Headless: SIGTERM stopper løkken her i stedet for SystemExit midt i en task
+        try:
+            loop.add_signal_handler(signal.SIGTERM, stop.set)
+        except NotImplementedError:
+            pass    # Windows: signal.signal fra main() gjelder
+
+    # Én lytter per bane, alle på samme event-loop
+    servers = []
+    for court in COURTS:
+        host = court.cfg["listen_host"]
+        port = court.cfg["listen_port"]
+        server = await asyncio.start_server(
+            functools.partial(handle_scorepad_async, court=court), host, port,
+            reuse_address=True)
+        servers.append(server)
+        log_tcp.info("%s[TCP] Lytter på %s:%s for Scorepad (Protocol TV, asyncio) etter %.0f ms ...",
+                     court.tag, host, port, (time.monotonic() - STARTED_AT) * 1000)
+
+    tasks = [
+        asyncio.create_task(VMIX_FANOUT.run_async(), name="vmix-sender"),
+        asyncio.create_task(clock_ticker_async(), name="clock-ticker"),
+        asyncio.create_task(debug_printer_async(), name="debug-printer"),
+    ]
+    if CONFIG["vmix_reconcile_interval"] > 0:
+        tasks.append(asyncio.create_task(vmix_reconciler_async(), name="vmix-reconciler"))
+    tasks.append(asyncio.create_task(config_watcher_async(), name="config-watcher"))
+    # Grafikken og metrikkene kommer først når portene er bundet
+    push_initial_graphics()
+    start_metrics_server()
+    try:
+        await stop.wait()
+        log_main.info("[MAIN] SIGTERM mottatt, avslutter asyncio-kjernen ...")
+    finally:
+        # Porter først, så alle tasks (også åpne Scorepad-tilkoblinger)
+        for server in servers:
+            server.close()
+        current = asyncio.current_task()
+        pending = [task for task in asyncio.all_tasks() if task is not current]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for server in servers:
+            await server.wait_closed()
+
+
+def run_async_core():
+    """Kjører hele asyncio-kjernen (blokkerer); egen tråd ved GUI, hovedtråden headless."""
+    import asyncio
+    asyncio.run(run_async_core_main())
 
 # ==========================================================
 #  GUI FOR OVERRIDES
 # ==========================================================
 
+tk = ttk = None     # lastes av _import_tk(); headless laster aldri tkinter
+
+
+def _import_tk():
+    global tk, ttk
+    if tk is None:
+        import tkinter
+        from tkinter import ttk as tkinter_ttk
+        tk, ttk = tkinter, tkinter_ttk
+
+
 class OverrideGUI:
     def __init__(self):
+        _import_tk()
         self.root = tk.Tk()
         self.root.title("Bodet → vMix gateway")
+        self.court = DEFAULT_COURT
 
         self._build_widgets()
 
     def _build_widgets(self):
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(1, weight=1)
+
+        # Banevalg (kun med flere baner): overrides redigeres per bane
+        if len(COURTS) > 1:
+            top = ttk.Frame(self.root, padding=(10, 10, 10, 0))
+            top.grid(row=0, column=0, sticky="ew")
+            ttk.Label(top, text="Court:").grid(row=0, column=0, sticky="w")
+            self.court_var = tk.StringVar(value=self.court.name)
+            box = ttk.Combobox(top, textvariable=self.court_var, state="readonly",
+                               values=[court.name for court in COURTS])
+            box.grid(row=0, column=1, sticky="w", padx=(5, 0))
+            box.bind("<<ComboboxSelected>>", lambda _e: self.select_court())
+
         frm = ttk.Frame(self.root, padding=10)
-        frm.grid(row=0, column=0, sticky="nsew")
+        frm.grid(row=1, column=0, sticky="nsew")
 
-        self.root.columnconfigure(0, weight=1)
-        self.root.rowconfigure(0, weight=1)
+        overrides = self.court.overrides
 
         # Team name overrides
         ttk.Label(frm, text="Home team name (TV):").grid(row=0, column=0, sticky="w")
-        self.home_name_var = tk.StringVar(value=OVERRIDES.home_name)
+        self.home_name_var = tk.StringVar(value=overrides.home_name)
         ttk.Entry(frm, textvariable=self.home_name_var, width=25).grid(row=0, column=1, sticky="ew")
 
         ttk.Label(frm, text="Away team name (TV):").grid(row=1, column=0, sticky="w")
-        self.away_name_var = tk.StringVar(value=OVERRIDES.away_name)
+        self.away_name_var = tk.StringVar(value=overrides.away_name)
         ttk.Entry(frm, textvariable=self.away_name_var, width=25).grid(row=1, column=1, sticky="ew")
 
-        self.force_team_var = tk.BooleanVar(value=OVERRIDES.force_team_names)
+        self.force_team_var = tk.BooleanVar(value=overrides.force_team_names)
         ttk.Checkbutton(frm, text="Use custom team names", variable=self.force_team_var)\
             .grid(row=2, column=0, columnspan=2, sticky="w", pady=(0, 10))
 
@@ -644,7 +3839,7 @@ class OverrideGUI:
         btn_away = ttk.Button(frm, text="Set AWAY player", command=self.set_away_player)
         btn_away.grid(row=6, column=1, pady=2, sticky="w")
 
-        self.force_player_var = tk.BooleanVar(value=OVERRIDES.force_player_names)
+        self.force_player_var = tk.BooleanVar(value=overrides.force_player_names)
         ttk.Checkbutton(frm, text="Use custom player names (for future overlays)",
                         variable=self.force_player_var)\
             .grid(row=7, column=0, columnspan=2, sticky="w")
@@ -664,13 +3859,25 @@ class OverrideGUI:
 
         self.refresh_lists()
 
+    def select_court(self):
+        name = self.court_var.get()
+        self.court = next(court for court in COURTS if court.name == name)
+
+        overrides = self.court.overrides
+        self.home_name_var.set(overrides.home_name)
+        self.away_name_var.set(overrides.away_name)
+        self.force_team_var.set(overrides.force_team_names)
+        self.force_player_var.set(overrides.force_player_names)
+        self.refresh_lists()
+
     def refresh_lists(self):
+        overrides = self.court.overrides
         self.list_home.delete(0, tk.END)
-        for num, name in sorted(OVERRIDES.players_home.items()):
+        for num, name in sorted(overrides.players_home.items()):
             self.list_home.insert(tk.END, f"{num}: {name}")
 
         self.list_away.delete(0, tk.END)
-        for num, name in sorted(OVERRIDES.players_away.items()):
+        for num, name in sorted(overrides.players_away.items()):
             self.list_away.insert(tk.END, f"{num}: {name}")
 
     def set_home_player(self):
@@ -681,7 +3888,7 @@ class OverrideGUI:
         name = self.player_name_var.get().strip()
         if not name:
             return
-        OVERRIDES.players_home[num] = name
+        self.court.overrides.players_home[num] = name
         self.refresh_lists()
 
     def set_away_player(self):
@@ -692,58 +3899,318 @@ class OverrideGUI:
         name = self.player_name_var.get().strip()
         if not name:
             return
-        OVERRIDES.players_away[num] = name
+        self.court.overrides.players_away[num] = name
         self.refresh_lists()
 
     def apply_names(self):
-        OVERRIDES.home_name = self.home_name_var.get().strip()
-        OVERRIDES.away_name = self.away_name_var.get().strip()
-        OVERRIDES.force_team_names = self.force_team_var.get()
-        OVERRIDES.force_player_names = self.force_player_var.get()
+        overrides = self.court.overrides
+        overrides.home_name = self.home_name_var.get().strip()
+        overrides.away_name = self.away_name_var.get().strip()
+        overrides.force_team_names = self.force_team_var.get()
+        overrides.force_player_names = self.force_player_var.get()
 
-        with state_lock:
-            VMIX.update_from_state(STATE)
+        CORE_BRIDGE.call(refresh_vmix, self.court)
 
     def run(self):
         self.root.mainloop()
 
+# ==========================================================
+#  METRIKK-ENDEPUNKT (Prometheus-tekstformat)
+# ==========================================================
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsWriter:
+    """Bygger Prometheus-tekst: HELP/TYPE én gang per metrikk, så verdiene."""
+
+    def __init__(self):
+        self.lines = []
+        self._declared = set()
+
+    def _declare(self, name: str, kind: str, help_text: str):
+        if name not in self._declared:
+            self._declared.add(name)
+            self.lines.append(f"# HELP {name} {help_text}")
+            self.lines.append(f"# TYPE {name} {kind}")
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> str:
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{_label(v)}"' for k, v in labels.items()) + "}"
+
+    def sample(self, name: str, kind: str, help_text: str, value, **labels):
+        self._declare(name, kind, help_text)
+        self.lines.append(f"{name}{self._labels(labels)} {value}")
+
+    def histogram(self, name: str, help_text: str, hist: Histogram, **labels):
+        self._declare(name, "histogram", help_text)
+        counts = list(hist.counts)
+        total = 0
+        for bound, count in zip(hist.bounds + (float("inf"),), counts):
+            total += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            self.lines.append(f"{name}_bucket{self._labels({**labels, 'le': le})} {total}")
+        self.lines.append(f"{name}_sum{self._labels(labels)} {hist.sum:.9f}")
+        self.lines.append(f"{name}_count{self._labels(labels)} {total}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def format_metrics() -> str:
+    """Alle metrikker, lest fra tellerne uten å stoppe parser, ticker eller sender."""
+    out = MetricsWriter()
+
+    for court in COURTS:
+        m = court.metrics
+        for nid, count in enumerate(list(m.frames)):
+            if count:
+                out.sample("bodet_frames_total", "counter",
+                           "Bodet-frames mottatt per melding (nid).", count, court=court.name,
+                           nid="invalid" if nid == CourtMetrics.INVALID_NID else f"{nid:02d}")
+        out.sample("bodet_bytes_received_total", "counter",
+                   "Bytes mottatt fra Scorepad.", m.bytes_received, court=court.name)
+        out.sample("bodet_framing_errors_total", "counter",
+                   "Frames forkastet av framingen (mangler STX, for kort).",
+                   m.framing_errors_total(), court=court.name)
+        out.sample("bodet_connections_total", "counter",
+                   "Scorepad-tilkoblinger (første + reconnects).", m.connections, court=court.name)
+        if isinstance(court.lock, TimedLock):
+            out.histogram("bodet_state_lock_wait_seconds",
+                          "Ventetid før banens state-lås ble tatt.", m.lock_wait, court=court.name)
+            out.histogram("bodet_state_lock_hold_seconds",
+                          "Tid banens state-lås ble holdt.", m.lock_hold, court=court.name)
+
+    for sender in VMIX_FANOUT.senders:
+        transport = sender.transport
+        dest = sender.name
+        out.sample("vmix_up", "gauge", "1 hvis vMix-maskinen svarer.",
+                   int(sender.healthy), destination=dest)
+        out.sample("vmix_requests_total", "counter",
+                   "Kommandoer sendt til vMix.", sender.requests, destination=dest)
+        for reason, count in (
+            ("rejected", sender.rejected + getattr(transport, "errors", 0)),
+            ("transport", sender.failed),
+            ("lost", getattr(transport, "lost", 0)),
+        ):
+            out.sample("vmix_request_failures_total", "counter",
+                       "Kommandoer som feilet, per årsak.", count,
+                       destination=dest, reason=reason)
+        out.histogram("vmix_request_duration_seconds",
+                      "Tid fra kommando sendt til vMix kvitterte.",
+                      sender.request_latency, destination=dest)
+        out.sample("vmix_queue_depth", "gauge",
+                   "Felter som venter i senderen.", sender.pending(), destination=dest)
+        out.sample("vmix_coalesced_total", "counter",
+                   "Verdier erstattet av nyere før de ble sendt.", sender.coalesced,
+                   destination=dest)
+        out.sample("vmix_throttled_total", "counter",
+                   "Ganger et felt ble holdt igjen av maks rate.", sender.throttled,
+                   destination=dest)
+        out.sample("vmix_outages_total", "counter",
+                   "Ganger maskinen gikk fra oppe til nede.", sender.outages, destination=dest)
+        if hasattr(transport, "reconnects"):
+            out.sample("vmix_reconnects_total", "counter",
+                       "TCP-oppkoblinger mot vMix.", transport.reconnects, destination=dest)
+
+    return out.text()
+
+
+def _metrics_handler():
+    """Handler-klassen lages ved første start, så http.server lastes kun ved behov."""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = format_metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            log_stats.debug("[METRIKK] " + fmt, *args)
+
+    return MetricsHandler
+
+
+def start_metrics_server(cfg: Dict[str, Any] = None):
+    """Starter endepunktet i en egen tråd (samme for begge kjernene)."""
+    cfg = cfg or CONFIG
+    host, port = cfg["metrics_host"], cfg["metrics_port"]
+    if not port:
+        return None
+    from http.server import ThreadingHTTPServer
+    try:
+        server = ThreadingHTTPServer((host, port), _metrics_handler())
+    except OSError as e:
+        log_stats.error("[METRIKK] Kunne ikke lytte på %s:%s: %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    log_stats.info("[METRIKK] http://%s:%s/metrics", host, port)
+    return server
+
 # ==========================================================
 #  DEBUG-PRINTER
 # ==========================================================
 
+def refresh_vmix(court: "Court" = None):
+    """Send banens state på nytt etter endrede overrides (kalles via CORE_BRIDGE)."""
+    court = court or DEFAULT_COURT
+    court.vmix.update_from_snapshot(court.snapshot, force=True)
+
+
 def debug_printer():
     while True:
         time.sleep(5)
-        with state_lock:
-            print("\n--- STATE ---")
-            print(
-                f"CLOCK: {STATE.clock}  (period {STATE.period})  "
-                f"SHOT: {STATE.shot_clock}  RUN: {'Y' if STATE.clock_running else 'N'}  "
-                f"SHOT_RUN: {'Y' if STATE.shot_running else 'N'}"
-            )
-            print(
-                f"HOME: {STATE.home.name}  {STATE.home.score} pts  "
-                f"F:{STATE.home.fouls}  TO:{STATE.to_home}"
-            )
-            print(
-                f"AWAY: {STATE.away.name}  {STATE.away.score} pts  "
-                f"F:{STATE.away.fouls}  TO:{STATE.to_away}"
+        log_stats_summary()
+
+
+def log_stats_summary():
+    if not log_stats.isEnabledFor(logging.INFO):
+        return
+
+    lines = [""]
+    for court in COURTS:
+        # Publisert bilde: ingen lås, og alle feltene fra samme versjon
+        snap = court.snapshot
+        v = snap.values
+        lines += [
+            (f"--- STATE {court.name} (v{snap.version}) ---" if court.tag
+             else f"--- STATE (v{snap.version}) ---"),
+            f"CLOCK: {v['game_clock']}  (period {v['period']})  "
+            f"SHOT: {v['shot_clock']}  RUN: {'Y' if v['clock_running'] else 'N'}  "
+            f"SHOT_RUN: {'Y' if v['shot_running'] else 'N'}",
+            f"HOME: {v['home_name']}  {v['home_score']} pts  "
+            f"F:{v['home_fouls']}  TO:{v['home_timeouts']}",
+            f"AWAY: {v['away_name']}  {v['away_score']} pts  "
+            f"F:{v['away_fouls']}  TO:{v['away_timeouts']}",
+        ]
+        for model in (court.game_clock, court.shot_clock):
+            lines.append(
+                f"KLOKKE {model.name}: drift={model.drift_ppm:+.0f} ppm  "
+                f"fasefeil snitt={model.phase_error * 1000:+.0f} ms  "
+                f"maks={model.max_phase_error * 1000:.0f} ms  "
+                f"innsvinget={model.slews}  hopp={model.snaps}"
             )
 
+    for sender in VMIX_FANOUT.senders:
+        health = "OK" if sender.healthy else "NEDE"
+        lines.append(
+            f"VMIX {sender.name} [{health}]: sendt={sender.sent}  "
+            f"slått sammen={sender.coalesced}  strupet={sender.throttled}  "
+            f"over budsjett={sender.over_budget}  "
+            f"i kø={sender.pending()}  hoppet over={sender.skipped}  "
+            f"tatt igjen={sender.caught_up}  avstemt={sender.reconciled}  "
+            f"brudd={sender.outages}  "
+            f"frame-latens siste={sender.last_frame_latency * 1000:.1f} ms  "
+            f"maks={sender.worst_frame_latency * 1000:.1f} ms"
+        )
+        delays = sender.queue_delay.summary()
+        for klass in PRIORITY_CLASSES:
+            st = delays.get(klass)
+            if st:
+                lines.append(
+                    f"  kø {klass:<6} n={st['n']:<5} p50={st['p50_ms']:6.1f}  "
+                    f"p99={st['p99_ms']:6.1f}  maks={st['max_ms']:6.1f} ms"
+                )
+
+    if LATENCY.enabled:
+        summary = LATENCY.format_summary()
+        if summary:
+            lines.append(f"--- LATENS (budsjett {CONFIG['latency_budget_ms']:.0f} ms, p99) ---")
+            lines.append(summary)
+        dump_path = CONFIG.get("latency_dump_path")
+        if dump_path:
+            try:
+                LATENCY.write_dump(dump_path)
+            except OSError as e:
+                log_stats.warning("[LATENS] Kunne ikke skrive %s: %s", dump_path, e)
+
+    log_stats.info("\n".join(lines))
+
 # ==========================================================
 #  MAIN
 # ==========================================================
 
-if __name__ == "__main__":
-    print("[MAIN] Bodet → vMix gateway m/GUI starter...")
+def push_initial_graphics():
+    """
+    Startgrafikk på alle baner, køes til vmix-sender: gjenopprettet state
+    fra sjekkpunktet i sin helhet, ellers nullstilte fouls-bilder (0 feil).
+    """
+    for court in COURTS:
+        if court.restored:
+            court.vmix.update_from_snapshot(court.snapshot, force=True)
+        else:
+            update_team_fouls_visual("A", 0, court)
+            update_team_fouls_visual("B", 0, court)
+
 
-    # Init: nullstill fouls-grafikk ved start (0 feil)
-    update_team_fouls_visual("A", 0)
-    update_team_fouls_visual("B", 0)
+def start_threads_core():
+    """Trådkjernen: porter først, så sender/ticker/avstemming, så grafikk."""
+    listeners = [(open_bodet_listener(court), court) for court in COURTS]
 
+    VMIX_FANOUT.start()
+    # Én lyttetråd per bane; ticker og sender er felles
+    for srv, court in listeners:
+        threading.Thread(target=serve_bodet_listener, args=(srv, court), daemon=True,
+                         name=f"scorepad{court.tag}").start()
     threading.Thread(target=debug_printer, daemon=True).start()
-    threading.Thread(target=start_bodet_server, daemon=True).start()
     threading.Thread(target=clock_ticker, daemon=True).start()
+    if CONFIG["vmix_reconcile_interval"] > 0:
+        threading.Thread(target=vmix_reconciler, daemon=True).start()
+    threading.Thread(target=config_watcher, daemon=True, name="config-watcher").start()
+    threading.Thread(target=push_initial_graphics, daemon=True, name="initial-graphics").start()
+    start_metrics_server()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bodet Scorepad → vMix gateway")
+    parser.add_argument("--headless", action="store_true",
+                        help="ingen GUI (tjeneste); tkinter lastes aldri")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    log_main.info("[MAIN] Bodet → vMix gateway %s starter...",
+                  "headless" if args.headless else "m/GUI")
+
+    for court in COURTS:
+        if court.restored:
+            state = court.state
+            log_main.info("%s[SJEKKPUNKT] Gjenopprettet fra %s: %s  %d-%d  P%d",
+                          court.tag, court.checkpoint.path, state.clock,
+                          state.home.score, state.away.score, state.period)
+        elif court.stale_checkpoint is not None:
+            log_main.info("%s[SJEKKPUNKT] Ignorerer %s (%.0f s gammelt), starter nullstilt",
+                          court.tag, court.checkpoint.path, court.stale_checkpoint)
+
+    if args.headless:
+        # Tjenestestyrer stopper med SIGTERM: avslutt rent (atexit kjører)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    if CONFIG["core"] == "asyncio":
+        if args.headless:
+            run_async_core()
+            return
+        # Hele kjernen på én event-loop; GUI-en når den via CORE_BRIDGE
+        threading.Thread(target=run_async_core, daemon=True).start()
+    else:
+        start_threads_core()
+
+    if args.headless:
+        threading.Event().wait()
+    else:
+        gui = OverrideGUI()
+        gui.run()
 
-    gui = OverrideGUI()
-    gui.run()
+
+if __name__ == "__main__":
+    main()